@@ -0,0 +1,376 @@
+# benchmarks/load_harness.py
+"""
+Run the scheduled RBA task and the !rba / !getName handlers end to end
+against a local eBird stand-in and fake Discord channels.
+
+    python -m benchmarks.load_harness --users 50 --commands 10 --latency-ms 80 --error-rate 0.02
+    python -m benchmarks.load_harness --replay recorded/ --rate-limit-rate 0.05 --output load.json
+
+The stand-in serves synthetic payloads (or JSON files recorded from the real
+API, see --replay) and can inject latency, 5xx errors and 429s. Nothing talks
+to api.ebird.org or Discord, and all data files go to a temporary directory.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from itertools import count
+
+from aiohttp import web
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import COUNTY_COUNT, generate_notable, generate_taxonomy  # noqa: E402
+
+_ids = count(1)
+
+
+# --------------------
+# eBird stand-in
+# --------------------
+class FakeEBird:
+    """aiohttp app answering the eBird endpoints the bot uses, with fault injection."""
+
+    def __init__(self, notable: list[dict], taxonomy: list[dict], regions: list[dict],
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 rate_limit_rate: float = 0, retry_after: float = 1, seed: int = 1):
+        self.notable = notable
+        self.taxonomy = taxonomy
+        self.regions = regions
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.by_county: dict[str, list[dict]] = {}
+        for row in notable:
+            self.by_county.setdefault(row.get("subnational2Code"), []).append(row)
+        self.requests = 0
+        self.statuses: dict[int, int] = {}
+
+        self.app = web.Application(middlewares=[self._faults])
+        self.app.router.add_get("/data/obs/{region}/recent/notable", self._notable)
+        self.app.router.add_get("/ref/taxonomy/ebird", lambda r: web.json_response(self.taxonomy))
+        self.app.router.add_get("/ref/taxonomy/versions",
+                                lambda r: web.json_response([{"authorityVer": 2025.0, "latest": True}]))
+        self.app.router.add_get("/ref/region/list/subnational2/{parent}", lambda r: web.json_response(self.regions))
+        self._runner = None
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        self.requests += 1
+        delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            response = web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+        elif roll < self.rate_limit_rate + self.error_rate:
+            response = web.Response(status=503, text="injected failure")
+        else:
+            response = await handler(request)
+        self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+        return response
+
+    async def _notable(self, request):
+        region = request.match_info["region"]
+        max_results = int(request.query.get("maxResults", 200))
+        rows = self.notable if region.count("-") == 1 else self.by_county.get(region, [])
+        return web.json_response(rows[:max_results])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+def load_payloads(replay_dir: str | None, observations: int, seed: int):
+    """Recorded responses from `replay_dir` where present, synthetic ones otherwise."""
+    def recorded(name):
+        path = os.path.join(replay_dir, name) if replay_dir else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return None
+
+    notable = recorded("notable.json") or generate_notable(observations, seed=seed)
+    taxonomy = recorded("taxonomy.json") or generate_taxonomy(seed=seed)
+    regions = recorded("regions.json") or [
+        {"code": f"US-CO-{n:03d}", "name": f"County {n:03d}"} for n in range(1, 2 * COUNTY_COUNT, 2)
+    ]
+    return notable, taxonomy, regions
+
+
+# --------------------
+# Fake Discord objects
+# --------------------
+class FakeMessage:
+    def __init__(self, channel, content=None, message_id=None):
+        self.id = message_id or next(_ids)
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content=None, **kwargs):
+        await self.channel._latency()
+        self.channel.edits.append((time.perf_counter(), self.id, content))
+        self.content = content
+        return self
+
+
+class FakeChannel:
+    """Records everything sent to it; each call takes `latency_ms`."""
+
+    def __init__(self, name: str, latency_ms: float = 0):
+        self.id = next(_ids)
+        self.name = name
+        self.latency_ms = latency_ms
+        self.sent: list[tuple[float, str | None, dict]] = []
+        self.edits: list[tuple[float, int, str | None]] = []
+
+    async def _latency(self):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def send(self, content=None, **kwargs):
+        await self._latency()
+        self.sent.append((time.perf_counter(), content, kwargs))
+        return FakeMessage(self, content)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id=message_id)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeAuthor:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeContext:
+    """Just enough of commands.Context for the command callbacks."""
+
+    def __init__(self, channel: FakeChannel, user: str):
+        self.channel = channel
+        self.message = type("FakeMessageRef", (), {"author": FakeAuthor(user)})()
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+# --------------------
+# Measurement
+# --------------------
+class StallMonitor:
+    """Measures how late a periodic tick wakes up; lateness is time the loop was blocked."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.stalls: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.stalls.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self) -> dict:
+        if not self.stalls:
+            return {}
+        ordered = sorted(self.stalls)
+        return {
+            "ticks": len(ordered),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            "over_50ms": sum(1 for s in ordered if s > 0.05),
+            "blocked_s": round(sum(ordered), 3),
+        }
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+# --------------------
+# Scenario
+# --------------------
+async def run_scenario(args) -> dict:
+    notable, taxonomy_data, regions = load_payloads(args.replay, args.observations, args.seed)
+    server = FakeEBird(notable, taxonomy_data, regions, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                       error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                       retry_after=args.retry_after, seed=args.seed)
+    base_url = await server.start()
+
+    # Configuration is read at import time, so set it before the bot modules load
+    os.environ["EBIRD_API_BASE"] = base_url
+    os.environ.setdefault("EBIRD_TOKEN", "load-harness")
+    os.environ.setdefault("DISCORD_TOKEN", "load-harness")
+    os.environ.setdefault("GUILD_ID", "0")
+    if args.unthrottled:
+        os.environ["EBIRD_RATE_PER_SEC"] = os.environ["EBIRD_BURST"] = "100000"
+        os.environ["DISCORD_GLOBAL_RATE"] = os.environ["DISCORD_CHANNEL_RATE"] = "100000"
+        os.environ["DISCORD_CHANNEL_BURST"] = "100000"
+
+    import bot_main
+    logging.getLogger("Dipper_RBA_Bot").setLevel(args.log_level)
+    from co_county_lookup import ingest_regions_to_db
+    from db import get_all_county_regions
+    from db_async import database
+    from ebird_api import notable_cache
+    from ebird_client import close_client, get_client
+    from region_registry import load_registry
+    from send_queue import outbound
+    from taxonomy import TaxonomyIndex
+    from tasks import rba_task
+
+    monitor = StallMonitor()
+    await database.start()
+    await load_registry()
+    monitor.start()
+    report = {}
+    try:
+        await ingest_regions_to_db()
+        bot_main.bot.taxonomy = TaxonomyIndex.from_ebird(await get_client().taxonomy())
+
+        # Scheduled run: every county channel gets its posts
+        county_channels = {r["code"]: FakeChannel(r["name"].lower().replace(" ", "-") + "-rba", args.send_latency_ms)
+                           for r in get_all_county_regions()}
+        start = time.perf_counter()
+        await rba_task(county_channels)
+        report["rba_task"] = {
+            "wall_s": round(time.perf_counter() - start, 3),
+            "channels": len(county_channels),
+            "messages": sum(len(c.sent) for c in county_channels.values()),
+            "edits": sum(len(c.edits) for c in county_channels.values()),
+        }
+
+        # Concurrent users issuing a mix of !rba and !getName
+        notable_cache.invalidate()
+        county_names = [r["name"] for r in get_all_county_regions()]
+        codes = [e.banding_codes[0] for e in bot_main.bot.taxonomy.by_species_code.values() if e.banding_codes]
+        latencies = {"rba": [], "getName": []}
+        rng = random.Random(args.seed)
+
+        async def user(n: int):
+            ctx = FakeContext(FakeChannel(f"dm-{n}", args.send_latency_ms), f"user{n}")
+            for _ in range(args.commands):
+                start = time.perf_counter()
+                if rng.random() < args.rba_share:
+                    await bot_main.rba(ctx, *rng.choice(county_names).split())
+                    latencies["rba"].append(time.perf_counter() - start)
+                else:
+                    await bot_main.getName(ctx, rng.choice(codes))
+                    latencies["getName"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(args.users)))
+        report["commands"] = {
+            "wall_s": round(time.perf_counter() - start, 3),
+            "users": args.users,
+            "per_user": args.commands,
+            "rba": latency_summary(latencies["rba"]),
+            "getName": latency_summary(latencies["getName"]),
+            "all": latency_summary(latencies["rba"] + latencies["getName"]),
+        }
+    finally:
+        await monitor.stop()
+        await outbound.close()
+        await close_client()
+        await database.stop()
+        await server.stop()
+
+    report["event_loop_stalls"] = monitor.summary()
+    report["ebird_stand_in"] = {"requests": server.requests,
+                                "statuses": {str(k): v for k, v in sorted(server.statuses.items())}}
+    report["send_queue"] = outbound.stats()
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent command users")
+    parser.add_argument("--commands", type=int, default=5, help="commands per user")
+    parser.add_argument("--rba-share", type=float, default=0.5, help="fraction of commands that are !rba")
+    parser.add_argument("--observations", type=int, default=3000, help="synthetic statewide notable rows")
+    parser.add_argument("--replay", help="directory with recorded notable.json / taxonomy.json / regions.json")
+    parser.add_argument("--latency-ms", type=float, default=50, help="added to every eBird response")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="random extra eBird latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of eBird requests answered 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--send-latency-ms", type=float, default=30, help="time each fake Discord send takes")
+    parser.add_argument("--unthrottled", action="store_true",
+                        help="lift the eBird and Discord rate budgets to measure raw throughput")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING", help="bot logger level during the run")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # ./data, the log file and the taxonomy store all land in the scratch directory
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            # Keep the bot's progress prints off stdout so the JSON report stays parseable
+            with contextlib.redirect_stdout(sys.stderr):
+                report = asyncio.run(run_scenario(args))
+        finally:
+            os.chdir(cwd)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# benchmarks/run_benchmarks.py
+"""
+Time each stage of the RBA pipeline on synthetic eBird payloads.
+
+    python -m benchmarks.run_benchmarks --sizes 200,1000,10000,100000 --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json
+
+Run from the repository root. The database stages write to a temporary
+SQLite file, never to ./data.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import db
+import time_utils
+from clustering import cluster_observations
+from discord_messages import chunked_rba_messages
+from ingest import build_observations
+from taxonomy import TaxonomyIndex
+from benchmarks.synthetic import generate_notable, generate_taxonomy
+
+DEFAULT_SIZES = (200, 1000, 10000, 100000)
+SAVE_ONE_LIMIT = 5000  # save_checklist commits per row; cap it so large sizes stay quick
+
+
+def reset_caches():
+    time_utils._tz_cache = time_utils._LRUCache(time_utils.TZ_CACHE_SIZE)
+    time_utils.get_zone.cache_clear()
+
+
+def timed(fn, *args, repeat: int = 1):
+    """Return (best seconds, last result) over `repeat` runs."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_size(n: int, seed: int, region: str, repeat: int, taxonomy: TaxonomyIndex) -> list[dict]:
+    rows = generate_notable(n, seed=seed, region=region)
+    results = []
+
+    def record(stage, seconds, items):
+        results.append({"stage": stage, "n": n, "items": items, "seconds": round(seconds, 6),
+                        "per_item_us": round(seconds / items * 1e6, 3) if items else None})
+
+    def local_to_utc():
+        for d in rows:
+            time_utils.ebird_local_to_utc(d["obsDt"], d["lat"], d["lng"])
+
+    reset_caches()
+    record("ebird_local_to_utc_cold", timed(local_to_utc)[0], n)
+    record("ebird_local_to_utc", timed(local_to_utc, repeat=repeat)[0], n)
+
+    seconds, observations = timed(build_observations, rows, region, repeat=repeat)
+    record("observation_construction", seconds, n)
+
+    seconds, clusters = timed(cluster_observations, observations, repeat=repeat)
+    record("cluster_observations", seconds, n)
+
+    seconds, messages = timed(chunked_rba_messages, observations, repeat=repeat)
+    record("chunked_rba_messages", seconds, n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.close_connection()
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        try:
+            subset = observations[:SAVE_ONE_LIMIT]
+            seconds, _ = timed(lambda: [db.save_checklist(o) for o in subset])
+            record("save_checklist", seconds, len(subset))
+            seconds, _ = timed(db.save_checklists, observations)
+            record("save_checklists", seconds, n)
+        finally:
+            db.close_connection()
+
+    rng = random.Random(seed)
+    entries = list(taxonomy.by_species_code.values())
+    queries = [rng.choice(entries) for _ in range(n)]
+    band_codes = [(e.banding_codes or e.com_name_codes or ("XXXX",))[0] for e in queries]
+    names = [e.com_name for e in queries]
+    record("taxonomy_getName", timed(lambda: [taxonomy.names_for_banding_code(c) or
+                                              taxonomy.names_for_com_name_code(c) for c in band_codes],
+                                     repeat=repeat)[0], n)
+    record("taxonomy_getBC", timed(lambda: [taxonomy.banding_codes_for_name(name) for name in names],
+                                   repeat=repeat)[0], n)
+
+    print(f"n={n}: {len(clusters)} clusters, {len(messages)} messages", file=sys.stderr)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: dict, current: dict, threshold: float) -> int:
+    """Print per-stage ratios against a previous run; returns how many stages regressed."""
+    before = {(r["stage"], r["n"]): r["seconds"] for r in previous["results"]}
+    regressions = 0
+    for r in current["results"]:
+        old = before.get((r["stage"], r["n"]))
+        if not old:
+            continue
+        ratio = r["seconds"] / old
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{r['stage']:<26} n={r['n']:<7} {old:9.4f}s -> {r['seconds']:9.4f}s  x{ratio:5.2f}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated observation counts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--region", choices=("US-CO", "US"), default="US-CO",
+                        help="US scatters points nationwide to exercise the timezone finder")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of N runs per stage")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio counted as a regression with --compare")
+    args = parser.parse_args(argv)
+
+    taxonomy = TaxonomyIndex.from_ebird(generate_taxonomy(seed=args.seed))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "region": args.region,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for n in (int(s) for s in args.sizes.split(",") if s):
+        report["results"].extend(bench_size(n, args.seed, args.region, args.repeat, taxonomy))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), report, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
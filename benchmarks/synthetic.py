@@ -0,0 +1,123 @@
+# benchmarks/synthetic.py
+import random
+import string
+from itertools import accumulate
+from datetime import datetime, timedelta
+
+# (min_lat, max_lat, min_lon, max_lon) to scatter hotspots over
+BOUNDS = {
+    "US-CO": (37.0, 41.0, -109.05, -102.05),
+    "US": (25.0, 49.0, -124.5, -67.0),  # lower 48, exercises the timezone finder
+}
+COUNTY_COUNT = 64  # Colorado has 64 counties
+
+
+def _zipf_weights(n: int, s: float) -> list[float]:
+    """Cumulative Zipf weights, ready for random.choices(cum_weights=...)."""
+    return list(accumulate(1 / (k ** s) for k in range(1, n + 1)))
+
+
+def _code(rng: random.Random, length: int) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=length))
+
+
+def generate_taxonomy(n: int = 17000, seed: int = 1) -> list[dict]:
+    """Taxonomy records shaped like eBird's /ref/taxonomy/ebird output."""
+    rng = random.Random(seed)
+    taxa = []
+    for i in range(n):
+        words = [_code(rng, rng.randint(4, 9)).capitalize() for _ in range(rng.choice((1, 2, 2, 3)))]
+        com_name = " ".join(words)
+        code = "".join(w[:4 if len(words) == 1 else 2] for w in words).upper()[:4]
+        taxa.append({
+            "sciName": f"{_code(rng, 8).capitalize()} {_code(rng, 9)}",
+            "comName": com_name,
+            "speciesCode": f"{_code(rng, 5)}{i}",
+            "category": "species",
+            "taxonOrder": float(i + 1),
+            "bandingCodes": [code] if rng.random() < 0.6 else [],
+            "comNameCodes": [code, _code(rng, 4).upper()],
+        })
+    return taxa
+
+
+def generate_notable(n: int, seed: int = 1, region: str = "US-CO", now: datetime | None = None,
+                     species: int | None = None, hotspots: int | None = None,
+                     observers: int | None = None) -> list[dict]:
+    """
+    Rows shaped like eBird's data/obs/{region}/recent/notable?detail=full.
+
+    Species, hotspots and observers are drawn with Zipf-like skew, as in real
+    notable lists: a few rarities are reported from a few hotspots by many
+    people, with a long tail of one-off reports. Each checklist carries one to
+    a handful of notable species, and obsDt falls in the last two days.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    species = species or max(20, min(800, n // 25))
+    hotspots = hotspots or max(10, min(5000, n // 8))
+    observers = observers or max(10, min(20000, n // 4))
+    min_lat, max_lat, min_lon, max_lon = BOUNDS[region]
+
+    species_list = [(f"{_code(rng, 6)}{i}", " ".join(_code(rng, rng.randint(4, 8)).capitalize()
+                                                      for _ in range(rng.choice((1, 2, 2, 3)))))
+                    for i in range(species)]
+    spots = []
+    for i in range(hotspots):
+        lat = round(rng.uniform(min_lat, max_lat), 6)
+        lng = round(rng.uniform(min_lon, max_lon), 6)
+        spots.append((f"L{100000 + i}", f"{_code(rng, 7).capitalize()} {rng.choice(('Reservoir', 'SWA', 'Park', 'Ponds', 'Open Space'))}",
+                      lat, lng, f"US-CO-{rng.randrange(1, 2 * COUNTY_COUNT, 2):03d}"))
+    people = [f"{_code(rng, 5).capitalize()} {_code(rng, 7).capitalize()}" for _ in range(observers)]
+
+    species_w = _zipf_weights(species, 1.1)
+    spot_w = _zipf_weights(hotspots, 0.9)
+    people_w = _zipf_weights(observers, 0.8)
+
+    rows = []
+    checklist = 0
+    while len(rows) < n:
+        checklist += 1
+        loc_id, loc_name, lat, lng, county = rng.choices(spots, cum_weights=spot_w)[0]
+        # Jitter personal locations off the hotspot now and then
+        if rng.random() < 0.15:
+            lat, lng, loc_id = round(lat + rng.uniform(-0.02, 0.02), 6), round(lng + rng.uniform(-0.02, 0.02), 6), f"L{9000000 + checklist}"
+        observer = rng.choices(people, cum_weights=people_w)[0]
+        obs_dt = (now - timedelta(minutes=rng.randrange(0, 48 * 60))).strftime("%Y-%m-%d %H:%M")
+        sub_id = f"S{200000000 + checklist}"
+        picks = list(dict.fromkeys(rng.choices(species_list, cum_weights=species_w, k=4)))[:rng.randint(1, 3)]
+        for species_code, com_name in picks:
+            media = rng.random() < 0.1
+            rows.append({
+                "speciesCode": species_code,
+                "comName": com_name,
+                "sciName": com_name.lower(),
+                "locId": loc_id,
+                "locName": loc_name,
+                "obsDt": obs_dt,
+                "howMany": rng.randint(1, 5),
+                "lat": lat,
+                "lng": lng,
+                "obsValid": False,
+                "obsReviewed": False,
+                "locationPrivate": loc_id.startswith("L9"),
+                "subId": sub_id,
+                "subnational2Code": county,
+                "subnational2Name": county,
+                "subnational1Code": "US-CO",
+                "subnational1Name": "Colorado",
+                "countryCode": "US",
+                "countryName": "United States",
+                "userDisplayName": observer,
+                "obsId": f"OBS{len(rows)}",
+                "checklistId": f"CL{checklist}",
+                "presenceNoted": False,
+                "hasComments": rng.random() < 0.3,
+                "firstName": observer.split()[0],
+                "lastName": observer.split()[1],
+                "hasRichMedia": media,
+                "evidence": "P" if media else None,
+            })
+            if len(rows) == n:
+                break
+    return rows
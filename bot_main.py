@@ -1,20 +1,28 @@
 import os
 from ebird_api import fetch_ebird_rba
+from ebird_client import get_client, close_client, EBirdError
 import discord
 from discord.ext import tasks
-from discord_messages import chunked_rba_messages
-from db import save_checklist, get_all_threads, save_thread, get_checklists_for_thread
-from time_utils import ebird_local_to_utc, get_timezone_name
+from discord_messages import iter_rba_messages, pack_messages, MAX_DISCORD_MSG_LEN
+from db import get_latest_sighting
 from datetime import datetime, timezone, timedelta, time
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-from models import Observation
-from co_county_lookup import lookup_region_code
-from tasks import build_region_channels_map, rba_task
+from ingest import build_observations
+from recency import badge_name, classify_recency, recompute_buckets, RecencyScheduler
+from db import add_checklist_listener
+from db_async import database
+from send_queue import outbound, INTERACTIVE
+from metrics import metrics, peak_rss_text, start_metrics_server, METRICS_LOG_MINUTES
+from taxonomy_store import TaxonomyStore, latest_version
+from co_county_lookup import lookup_region_code, suggest_regions, ingest_regions_to_db
+from region_registry import get_registry, load_registry
+from tasks import rba_task
+from channel_registry import channel_registry
+from poll_scheduler import PollScheduler, RBA_ADAPTIVE_POLLING
 from discord.ext import commands
 import logging
-import requests
-import json
+import asyncio
 
 # Create a logger object
 logger = logging.getLogger("Dipper_RBA_Bot")
@@ -47,12 +55,35 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', case_insensitive=True, intents=intents)
+class DipperBot(commands.Bot):
+    metrics_runner = None
+
+    async def setup_hook(self):
+        # Writer thread + read pool keep SQLite I/O off the event loop
+        await database.start()
+        # Lookups and the pollers use the in-memory registry, so nothing queries regions on the loop later
+        await load_registry()
+        self.metrics_runner = await start_metrics_server()
+
+    async def close(self):
+        # Release the pooled eBird session and flush pending writes before the loop goes away
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        if poll_scheduler is not None:
+            poll_scheduler.stop()
+        await outbound.close()
+        await close_client()
+        await database.stop()
+        await super().close()
+
+bot = DipperBot(command_prefix='!', case_insensitive=True, intents=intents)
 
 GUILD_ID = int(os.getenv("GUILD_ID"))
 
 MT = ZoneInfo("America/Denver")
-region_channels = None  # global cache
+taxonomy_store = TaxonomyStore()
+recency_scheduler = None  # created in on_ready, needs the running loop
+poll_scheduler = None  # staggered county polling, see poll_scheduler.py
 
 @bot.event
 async def on_ready():
@@ -63,118 +94,147 @@ async def on_ready():
         logger.error("Guild not found")
     else:
         logger.info(f"Connected to guild: {guild.name}")
+        channel_registry.build(guild)
+
+    # Serve lookups from the local taxonomy right away; refresh from eBird in the background
+    with metrics.timed("startup_seconds", step="taxonomy"):
+        bot.taxonomy = await asyncio.to_thread(taxonomy_store.load_index)
+    version = await asyncio.to_thread(taxonomy_store.version)
+    logger.info(f"Taxonomy index loaded with {len(bot.taxonomy)} entries (version {version}, "
+                f"peak RSS {peak_rss_text()})")
+    if not taxonomy_refresh.is_running():
+        taxonomy_refresh.start()
+
+    # The scheduled loop maps channels from the county list, so make sure there is one
+    if not get_registry():
+        with metrics.timed("startup_seconds", step="regions"):
+            await refresh_regions()
+    if not region_refresh.is_running():
+        region_refresh.start()
+
+    # Badge transitions are driven by the scheduler from now on
+    global recency_scheduler
+    if recency_scheduler is None:
+        recency_scheduler = RecencyScheduler(on_change=apply_recency_badges)
+        add_checklist_listener(recency_scheduler.note_observations)
+        with metrics.timed("startup_seconds", step="recency"):
+            fixed = await recency_scheduler.start()
+        if fixed:
+            # Badges that drifted while offline are corrected in place, without a message
+            await apply_recency_badges(fixed)
+        logger.info(f"Recency scheduler tracking {len(recency_scheduler)} upcoming transitions")
+
+    # Counties are refreshed one at a time through the day; the 7am/5pm digests reuse that data
+    global poll_scheduler
+    if RBA_ADAPTIVE_POLLING and poll_scheduler is None:
+        poll_scheduler = PollScheduler(channel_registry)
+        poll_scheduler.start()
+        logger.info(f"Poll scheduler started with a budget of {poll_scheduler.budget} eBird requests per day")
 
-    # Load previous taxonomy snapshot if it exists
-    if os.path.exists("taxonomy_snapshot.json"):
-        with open("taxonomy_snapshot.json", "r") as f:
-            old_data = json.load(f)
-    else:
-        old_data = []
+    # Start the scheduled RBA loop
+    if not scheduled_rba.is_running():
+        scheduled_rba.start()
+    if not metrics_summary.is_running():
+        metrics_summary.start()
+    logger.info(f"Startup complete, peak RSS {peak_rss_text()}")
 
-    url = "https://api.ebird.org/v2/ref/taxonomy/ebird?locale=en&fmt=json"
-    payload={}
-    headers = {
-        'X-eBirdApiToken': EBIRD_TOKEN
-    }
-    res = requests.get(url, headers=headers, data=payload)
-    data = res.json()
 
-    def build_name_map(taxonomy_data):
-        return {entry["speciesCode"]: entry["comName"] for entry in taxonomy_data}
+@tasks.loop(minutes=METRICS_LOG_MINUTES)
+async def metrics_summary():
+    logger.info("Metrics summary:\n  " + "\n  ".join(metrics.summary_lines()))
 
-    old_names = build_name_map(old_data)
-    new_names = build_name_map(data)
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = asyncio.get_running_loop().time()
 
-    name_changes = {}
-    for code, new_name in new_names.items():
-        old_name = old_names.get(code)
-        if old_name and old_name != new_name:
-            name_changes[old_name] = new_name
+@bot.after_invoke
+async def record_command_time(ctx):
+    metrics.observe("command_seconds", asyncio.get_running_loop().time() - ctx.started_at,
+                    command=ctx.command.name)
 
-    for old, new in name_changes.items():
-        logger.info(f"Taxonomy update: '{old}' → '{new}'")
 
-    # Optional: detect new species codes
-    old_codes = set(old_names)
-    new_codes = set(new_names)
-    new_species = new_codes - old_codes
-    if new_species:
-        logger.warning(f"New species codes detected: {new_species}")
+@tasks.loop(hours=24)
+async def taxonomy_refresh():
+    """Download the eBird taxonomy only when its version differs from the stored one."""
+    try:
+        if await asyncio.to_thread(taxonomy_store.import_legacy_snapshot):
+            logger.info("Seeded taxonomy store from taxonomy_snapshot.json")
 
-    with open("taxonomy_snapshot.json", "w") as f:
-        json.dump(data, f, indent=2)
+        version = latest_version(await get_client().taxonomy_versions())
+        if version and version == await asyncio.to_thread(taxonomy_store.version):
+            logger.info(f"Taxonomy is current (version {version})")
+            return
 
+        # Parse the download straight into the store's staging table and the new index
+        update = await asyncio.to_thread(taxonomy_store.begin_update)
+        try:
+            await get_client().stream_taxonomy(
+                on_batch=lambda batch: asyncio.to_thread(update.add, batch),
+                on_restart=lambda: asyncio.to_thread(update.reset),
+            )
+            diff = await asyncio.to_thread(update.commit, version)
+            taxonomy = update.index()
+        finally:
+            update.close()
+    except (EBirdError, ValueError) as e:
+        logger.error(f"Taxonomy refresh failed, keeping stored version: {e}")
+        return
 
-    bot.codesList = []
-    f = open("codesList.txt", "w")
-    for d in data:
-        species = {'comName': d['comName'], 'bandingCodes': d['bandingCodes'], 'comNameCodes': d['comNameCodes'], 'speciesCode': d['speciesCode']}
-        f.write(f'{species}\n')
-        bot.codesList.append(species)
-    f.close()
-    
-    # logger.debug(bot.codesList)
+    for old, new in diff.name_changes:
+        logger.info(f"Taxonomy update: '{old}' → '{new}'")
+    if diff.new_species:
+        logger.warning(f"New species codes detected: {set(diff.new_species)}")
 
-    # Start the scheduled RBA loop
-    if not scheduled_rba.is_running():
-        scheduled_rba.start()
+    bot.taxonomy = taxonomy
+    logger.info(f"Taxonomy updated to version {version} ({len(bot.taxonomy)} entries, peak RSS {peak_rss_text()})")
+
+
+async def refresh_regions():
+    try:
+        await ingest_regions_to_db()
+    except EBirdError as e:
+        logger.error(f"Region refresh failed, using stored regions: {e}")
+
+@tasks.loop(hours=24)
+async def region_refresh():
+    """Re-sync the county list from eBird about once a week."""
+    refreshed_at = get_registry().refreshed_at
+    if refreshed_at and datetime.now(timezone.utc) - refreshed_at < timedelta(days=7):
+        return
+    await refresh_regions()
 
 
 async def handle_rba_command(channel, region_code: str):
     # Normalize user input
     region_name_norm = region_code.strip().lower()
 
-    # Look up region code in DB
+    # Look up region code in the registry
     region_code = lookup_region_code(region_name_norm)
     if not region_code:
-        await channel.send(f"Could not find a region matching '{region_code}'.")
+        text = f"Could not find a region matching '{region_name_norm}'."
+        suggestions = suggest_regions(region_name_norm)
+        if suggestions:
+            text += f" Did you mean: {', '.join(suggestions)}?"
+        await outbound.send(channel, text, priority=INTERACTIVE)
         return
 
     # Now use the region_code for eBird API
-    recent_obs_dicts = fetch_ebird_rba(region_code)
-
-    recent_obs = []
-    for d in recent_obs_dicts:
-        lat = d.get("lat")
-        lon = d.get("lng")
-        if lat is None or lon is None:
-            tz_name = "UTC"
-        else:
-            tz_name = get_timezone_name(lat, lon)
-
-        obs_utc = ebird_local_to_utc(d.get("obsDt"), lat, lon)
-
-        obs = Observation(
-            checklist_id=d.get("subId"),
-            species=d.get("comName"),
-            region=region_code,
-            location=d.get("locName", "Unknown"),
-            observer=d.get("userDisplayName", "Unknown"),
-            obs_datetime=obs_utc,
-            local_tz=tz_name,
-            thread_tracker_key=None,
-            lat=lat,
-            lon=lon,
-            has_media=bool(d.get("hasRichMedia", []))  # True if there are media items
-        )
-        recent_obs.append(obs)
-
-    messages = chunked_rba_messages(recent_obs)
-
-    for msg in messages:
-        await channel.send(msg, silent=True)
-
-
-async def scheduled_rba_fetch():
-    for region in REGION_CODES:
-        recent_obs = fetch_ebird_rba(region)
-        for obs in recent_obs:
-            obs.obs_datetime = ebird_local_to_utc(obs.obs_datetime, obs.lat, obs.lon)
-            save_checklist(obs)
-        await update_threads_for_region(region_code)
-        # Optionally notify moderators or log
-
-       
+    try:
+        with metrics.timed("command_stage_seconds", command="rba", stage="fetch"):
+            recent_obs_dicts = await fetch_ebird_rba(region_code)
+    except EBirdError as e:
+        logger.error(f"eBird fetch failed for {region_code}: {e}")
+        await outbound.send(channel, "eBird is not responding right now, please try again in a few minutes.",
+                            priority=INTERACTIVE)
+        return
+
+    with metrics.timed("command_stage_seconds", command="rba", stage="ingest"):
+        recent_obs = build_observations(recent_obs_dicts, region_code)
+
+    with metrics.timed("command_stage_seconds", command="rba", stage="post"):
+        await outbound.send_all(channel, iter_rba_messages(recent_obs), priority=INTERACTIVE, silent=True)
+
+
 def identify_pending_moderation():
     return get_pending_moderation()  # from db.py
 
@@ -193,65 +253,55 @@ async def handle_moderation_action(checklist_id, action, moderator):
 
 def compute_recency(thread_tracker_key: str) -> str:
     """Compute recency bucket based on the most recent checklist in UTC."""
-    checklists = get_checklists_for_thread(thread_tracker_key)
-    if not checklists:
-        return "No reports"
-
-    # Find the latest checklist timestamp
-    latest_dt = max(obs.obs_datetime for obs in checklists)
-
-    # Current time in UTC
-    now_utc = datetime.now(timezone.utc)
-
-    delta = now_utc - latest_dt
-
-    if delta < timedelta(days=1):
-        return "<24h"
-    elif delta < timedelta(days=3):
-        return "1-3d"
-    elif delta < timedelta(days=7):
-        return "3-7d"
-    else:
-        return ">7d"
+    return classify_recency(get_latest_sighting(thread_tracker_key))
 
 async def update_threads_for_region(region_code: str, discord_client: discord.Client = None):
     """Update threads for a region with new recency buckets. Optionally edit Discord threads."""
-    threads = get_all_threads()
-    for thread in threads:
-        # Filter by region (tracker key format: "species|region")
-        _, thread_region = thread.tracker_key.split("|")
-        if thread_region != region_code:
-            continue
-
-        # Compute new recency
-        new_bucket = compute_recency(thread.tracker_key)
-        thread.status_bucket = new_bucket
-        save_thread(thread)
-
-        # Optionally update Discord thread message if client is provided
-        if discord_client and hasattr(thread, "discord_channel_id"):
-            try:
-                channel = discord_client.get_channel(thread.discord_channel_id)
-                if channel:
-                    msg = f"Recency update: {thread.tracker_key} is now in bucket {new_bucket}"
-                    await channel.send(msg)
-            except Exception as e:
-                print(f"Failed to update Discord thread {thread.thread_id}: {e}")
+    # Only threads whose bucket actually changed come back (already saved)
+    changed = await database.write(recompute_buckets, region_code)
+
+    # Optionally update Discord thread message if client is provided
+    if discord_client:
+        await apply_recency_badges(changed, discord_client)
+
+async def apply_recency_badges(changed, discord_client: discord.Client = bot):
+    """Show each changed thread's new bucket as a badge in its name (an edit, not a new message)."""
+    for thread in changed:
+        try:
+            channel = discord_client.get_channel(thread.thread_id)
+            if channel:
+                name = badge_name(channel.name, thread.status_bucket)
+                if name != channel.name:
+                    await outbound.edit(channel, name=name)
+        except Exception as e:
+            print(f"Failed to update Discord thread {thread.thread_id}: {e}")
 
 @tasks.loop(time=[time(7, 0, tzinfo=MT), time(17, 0, tzinfo=MT)])
 async def scheduled_rba():
-    global region_channels
+    # Resolved per run, so channels created or renamed since startup are included
+    region_channels = channel_registry.region_channels()
     if region_channels:
-        await rba_task(region_channels)
+        # Counties polled recently enough are posted from that data rather than fetched again
+        prefetched = poll_scheduler.snapshot() if poll_scheduler else None
+        await rba_task(region_channels, prefetched=prefetched)
     else:
         print("[RBA] No region channels mapped yet.")
 
 @scheduled_rba.before_loop
 async def before_scheduled_rba():
-    global region_channels
     await bot.wait_until_ready()
-    guild = bot.get_guild(int(GUILD_ID))
-    region_channels = await build_region_channels_map(guild)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    channel_registry.add(channel)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    channel_registry.remove(channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    channel_registry.update(before, after)
 
 @bot.command()
 async def rba(ctx, *arg):
@@ -270,21 +320,10 @@ async def getName(ctx, *arg):
     bc = bc.upper()
 
     logger.info(f"'{bc}'")
- 
-    speciesNames = []
-    speciesNames2 = []
-    for i in bot.codesList:
-        if bc in i['bandingCodes']:
-            species = i['comName']
-            logger.info(f"Found species in bandingCodes: {species}")
-            speciesNames.append(species)
-            
-        if bc in i['comNameCodes']:
-            species = i['comName']
-            logger.info(f"Found species in comNameCodes: {species}")
-            speciesNames2.append(species)
-
-    logger.debug(len(speciesNames))
+
+    speciesNames = list(bot.taxonomy.names_for_banding_code(bc))
+    speciesNames2 = list(bot.taxonomy.names_for_com_name_code(bc))
+
     logger.debug(speciesNames)
     logger.debug(speciesNames2)
 
@@ -313,15 +352,7 @@ async def getBC(ctx, *arg):
         await ctx.send(embed=embed, silent=True)
         return
     args = ' '.join(arg)
-    cn = args.lower()
-    speciesCodes = []
-    for i in bot.codesList:
-        if cn == i['comName'].lower():
-            species = i['bandingCodes']
-            if not species:
-                continue
-            else:
-                speciesCodes.append(species)
+    speciesCodes = [list(codes) for codes in bot.taxonomy.banding_codes_for_name(args)]
     if (len(speciesCodes) > 1):
         await ctx.send(f'Species name needs disambiguation.  Possible answers are: {speciesCodes}')
     elif not speciesCodes:
@@ -329,4 +360,14 @@ async def getBC(ctx, *arg):
     else:
         await ctx.send(str(speciesCodes[0]).replace('[', '').replace(']','').replace("'",""))
 
-bot.run(TOKEN)
\ No newline at end of file
+@bot.command()
+@commands.check_any(commands.is_owner(), commands.has_permissions(administrator=True))
+async def stats(ctx):
+    """Admin only: stage latencies (p50/p95/p99) and counters since startup."""
+    logger.info(f"Called stats @ {datetime.now()} from {ctx.message.author.name}")
+    lines = metrics.summary_lines()
+    for text, _ in pack_messages(((None, [line]) for line in lines), MAX_DISCORD_MSG_LEN - 8):
+        await outbound.send(ctx.channel, f"```\n{text}\n```", priority=INTERACTIVE)
+
+if __name__ == "__main__":
+    bot.run(TOKEN)
@@ -0,0 +1,91 @@
+# channel_registry.py
+import logging
+import discord
+from region_registry import get_registry
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+
+def region_channel_name(county_name: str) -> str:
+    """Channel a county posts to, e.g. "El Paso" -> "el-paso-rba"."""
+    return f"{county_name.lower().replace(' ', '-')}-rba"
+
+
+class ChannelRegistry:
+    """
+    Name -> text channel map for the bot's guild.
+
+    Built in one pass over the guild's channels and then kept current by the
+    channel create/delete/update gateway events, so channels added or renamed
+    after startup are picked up without rescanning. Region codes resolve
+    through the region registry to the county's "<name>-rba" channel.
+    """
+
+    def __init__(self):
+        self.guild: discord.Guild | None = None
+        self.by_name: dict[str, discord.TextChannel] = {}
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def build(self, guild: discord.Guild):
+        self.guild = guild
+        self.by_name = {}
+        for channel in guild.text_channels:  # position order; the first of a duplicated name wins
+            self.by_name.setdefault(channel.name, channel)
+        logger.info(f"Channel registry built with {len(self.by_name)} text channels")
+        return self
+
+    def _tracks(self, channel) -> bool:
+        return (self.guild is not None and isinstance(channel, discord.TextChannel)
+                and channel.guild.id == self.guild.id)
+
+    # --------------------
+    # Gateway events
+    # --------------------
+    def add(self, channel):
+        if self._tracks(channel):
+            self.by_name.setdefault(channel.name, channel)
+
+    def remove(self, channel):
+        if not self._tracks(channel) or channel.id != getattr(self.by_name.get(channel.name), "id", None):
+            return
+        del self.by_name[channel.name]
+        # Another channel with the same name takes over, as a fresh scan would pick it
+        replacement = discord.utils.get(self.guild.text_channels, name=channel.name)
+        if replacement and replacement.id != channel.id:
+            self.by_name[channel.name] = replacement
+
+    def update(self, before, after):
+        if before.name != after.name:
+            self.remove(before)
+            self.add(after)
+        elif self._tracks(after) and getattr(self.by_name.get(after.name), "id", None) == after.id:
+            self.by_name[after.name] = after  # keep the freshest object
+
+    # --------------------
+    # Lookups
+    # --------------------
+    def get(self, name: str) -> discord.TextChannel | None:
+        return self.by_name.get(name)
+
+    def for_region(self, region_code: str) -> discord.TextChannel | None:
+        region = get_registry().get(region_code)
+        return self.by_name.get(region_channel_name(region.name)) if region else None
+
+    def region_channels(self) -> dict[str, discord.TextChannel]:
+        """region_code -> channel for every county that currently has a channel."""
+        region_channels = {}
+        missing = []
+        for region in get_registry().counties():
+            channel = self.by_name.get(region_channel_name(region["name"]))
+            if channel:
+                region_channels[region["code"]] = channel
+            else:
+                missing.append(f"{region['name']} ({region['code']})")
+        if missing:
+            logger.warning(f"No RBA channel found for {len(missing)} counties: {', '.join(missing)}")
+        return region_channels
+
+
+channel_registry = ChannelRegistry()
@@ -0,0 +1,216 @@
+# clustering.py
+from functools import lru_cache
+from math import radians, sin, cos, sqrt, atan2, ceil, floor, pi
+
+try:
+    import numpy as np
+except ImportError:  # optional; the scalar ClusterIndex path is used without it
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = pi * EARTH_RADIUS_KM / 180
+
+# Batches at least this large use the NumPy path when it is available
+BATCH_MIN_OBSERVATIONS = 2000
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+@lru_cache(maxsize=4096)
+def normalize_species_name(name: str) -> str:
+    base = name.split("(")[0].strip()
+    return "".join(c.lower() for c in base if c.isalnum() or c.isspace())
+
+
+class ClusterIndex:
+    """
+    Incremental species@location clustering.
+
+    An observation joins the oldest existing cluster of the same normalized
+    species whose anchor (the cluster's first observation) lies within
+    `threshold_km`, otherwise it starts a new cluster. Anchors are bucketed by
+    species and then by a lat/lon grid whose cells are `threshold_km` tall, so
+    only neighbouring cells are distance-checked. Observations at an eBird
+    locId that already joined a cluster skip the distance check entirely.
+    """
+
+    def __init__(self, threshold_km: float = 2):
+        self.threshold_km = threshold_km
+        self.cell_deg = max(threshold_km / KM_PER_DEG_LAT, 1e-9)
+        self.clusters: dict[tuple, list] = {}  # key -> list[obs], in creation order
+        self._grids: dict[str, dict[tuple[int, int], list]] = {}  # species -> cell -> [(seq, key)]
+        self._by_loc: dict[tuple[str, str], tuple] = {}  # (species, locId) -> key
+        self._no_coords: dict[tuple[str, str], tuple] = {}  # (species, location) -> key
+
+    def _cell(self, lat, lon) -> tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lon / self.cell_deg)
+
+    def _lon_reach(self, lat, lon) -> int | None:
+        """Grid columns to search either side, or None to search the whole species grid."""
+        max_lat = abs(lat) + self.cell_deg
+        if max_lat >= 89:
+            return None
+        # Longitude degrees shrink by cos(lat), so a threshold can span several columns
+        reach = ceil(1.001 / cos(radians(max_lat)))
+        if abs(lon) + (reach + 1) * self.cell_deg >= 180:
+            return None  # neighbours may wrap around the antimeridian
+        return reach
+
+    def _find(self, grid, lat, lon):
+        row, col = self._cell(lat, lon)
+        reach = self._lon_reach(lat, lon)
+        if reach is None:
+            candidates = (entry for bucket in grid.values() for entry in bucket)
+        else:
+            candidates = (
+                entry
+                for r in (row - 1, row, row + 1)
+                for c in range(col - reach, col + reach + 1)
+                for entry in grid.get((r, c), ())
+            )
+
+        best = None
+        for seq, key in candidates:
+            if best is not None and seq > best[0]:
+                continue
+            if haversine(lat, lon, key[1], key[2]) <= self.threshold_km:
+                best = (seq, key)
+        return best[1] if best else None
+
+    def add(self, obs) -> tuple:
+        norm_name = normalize_species_name(obs.species)
+        lat, lon = obs.lat, obs.lon
+        loc_id = getattr(obs, "loc_id", None)
+
+        if lat is None or lon is None:
+            # No coordinates to compare; only identical locations cluster together
+            key = self._no_coords.setdefault((norm_name, obs.location or "Unknown"),
+                                             (obs.species, lat, lon, obs.location or "Unknown"))
+            self.clusters.setdefault(key, []).append(obs)
+            return key
+
+        key = self._by_loc.get((norm_name, loc_id)) if loc_id else None
+        if key is None:
+            grid = self._grids.setdefault(norm_name, {})
+            key = self._find(grid, lat, lon)
+            if key is None:
+                key = (obs.species, lat, lon, obs.location or "Unknown")
+                grid.setdefault(self._cell(lat, lon), []).append((len(self.clusters), key))
+                self.clusters[key] = []
+            if loc_id:
+                self._by_loc[(norm_name, loc_id)] = key
+
+        self.clusters[key].append(obs)
+        return key
+
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    """Element-wise haversine distance (km) between coordinate arrays in radians."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def cluster_observations_batch(observations, threshold_km=2):
+    """
+    NumPy version of cluster_observations for large batches, returning the
+    same mapping.
+
+    Observations are reduced to distinct (species, point) pairs. Candidate
+    neighbour pairs come from a sort on (species, latitude) with a window of
+    `threshold_km` of latitude, and all their haversine distances are computed
+    in one broadcast. A final pass over points in first-seen order then
+    applies the earliest-anchor-wins rule using only those neighbour lists.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for batch clustering")
+
+    observations = list(observations)
+    species_ids: dict[str, int] = {}
+    point_ids: dict[tuple, int] = {}  # (species id, lat, lon) -> point id, numbered by first appearance
+    first_row: list[int] = []
+    rows, point_of_row = [], []
+    no_coords: dict[tuple[str, str], list[int]] = {}
+    for i, obs in enumerate(observations):
+        norm_name = normalize_species_name(obs.species)
+        if obs.lat is None or obs.lon is None:
+            no_coords.setdefault((norm_name, obs.location or "Unknown"), []).append(i)
+            continue
+        point = (species_ids.setdefault(norm_name, len(species_ids)), obs.lat, obs.lon)
+        p = point_ids.setdefault(point, len(point_ids))
+        if p == len(first_row):
+            first_row.append(i)
+        rows.append(i)
+        point_of_row.append(p)
+
+    anchors: list[tuple[int, list[int]]] = [(members[0], members) for members in no_coords.values()]
+
+    if rows:
+        # Every observation at the same point lands in the same cluster, so cluster points, not rows
+        rows, point_of_row = np.asarray(rows), np.asarray(point_of_row)
+        first_row = np.asarray(first_row)
+        points = np.array(list(point_ids), dtype=float)
+        n_points = len(points)
+
+        # Great-circle distance is at least the latitude difference, so only
+        # points of the same species within that latitude window can match
+        lat_window = threshold_km / KM_PER_DEG_LAT * 1.000001
+        sort_key = points[:, 0] * 1000.0 + (points[:, 1] + 90.0)
+        by_key = np.argsort(sort_key, kind="stable")
+        sorted_key = sort_key[by_key]
+        upper = np.searchsorted(sorted_key, sorted_key + lat_window, side="right")
+        counts = upper - np.arange(n_points) - 1
+        left = np.repeat(np.arange(n_points), counts)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(counts) - counts, counts)
+        right = left + 1 + offsets
+        a, b = by_key[left], by_key[right]
+
+        lats, lons = np.radians(points[:, 1]), np.radians(points[:, 2])
+        close = _haversine_np(lats[a], lons[a], lats[b], lons[b]) <= threshold_km
+        earlier, later = np.minimum(a[close], b[close]), np.maximum(a[close], b[close])
+        by_later = np.lexsort((earlier, later))
+        earlier, later = earlier[by_later].tolist(), later[by_later]
+        bounds = np.searchsorted(later, np.arange(n_points + 1)).tolist()
+
+        anchor_of = [0] * n_points
+        is_anchor = bytearray(n_points)
+        for p in range(n_points):
+            anchor = p
+            for q in earlier[bounds[p]:bounds[p + 1]]:
+                if is_anchor[q]:
+                    anchor = q
+                    break
+            if anchor == p:
+                is_anchor[p] = 1
+            anchor_of[p] = anchor
+
+        anchor_of_row = np.asarray(anchor_of)[point_of_row]
+        grouped = np.argsort(anchor_of_row, kind="stable")
+        anchor_ids, starts = np.unique(anchor_of_row[grouped], return_index=True)
+        anchor_rows = first_row[anchor_ids].tolist()
+        grouped_rows = rows[grouped].tolist()
+        ends = starts[1:].tolist() + [len(grouped_rows)]
+        for anchor_row, start, end in zip(anchor_rows, starts.tolist(), ends):
+            anchors.append((anchor_row, grouped_rows[start:end]))
+
+    clusters = {}
+    for anchor, members in sorted(anchors, key=lambda item: item[0]):
+        first = observations[anchor]
+        clusters[(first.species, first.lat, first.lon, first.location or "Unknown")] = [observations[i] for i in members]
+    return clusters
+
+
+def cluster_observations(observations, threshold_km=2):
+    """Group observations into {(species, lat, lon, location): [obs, ...]}."""
+    if np is not None:
+        observations = list(observations)
+        if len(observations) >= BATCH_MIN_OBSERVATIONS:
+            return cluster_observations_batch(observations, threshold_km)
+
+    index = ClusterIndex(threshold_km)
+    for obs in observations:
+        index.add(obs)
+    return index.clusters
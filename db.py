@@ -1,22 +1,114 @@
 # db.py
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from db_schema import init_db
-from models import ThreadRecord, Observation, ChecklistModeration, MissedObservation
+from models import ThreadRecord, Observation, ChecklistModeration, MissedObservation, PostedCluster
 from time_utils import ebird_local_to_utc  # <-- new
 
 DB_FILE = "./data/dipper_bot.db"
-_conn = None  # persistent connection
+_local = threading.local()  # one persistent connection per thread (sqlite3 objects are thread-bound)
+_checklist_listeners = []  # called with each batch of saved observations
+
+
+def add_checklist_listener(callback):
+    """Register callback(observations), called after every committed checklist batch."""
+    _checklist_listeners.append(callback)
+
+
+def remove_checklist_listener(callback):
+    if callback in _checklist_listeners:
+        _checklist_listeners.remove(callback)
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """WAL lets readers run alongside the writer; NORMAL sync is durable enough under WAL."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-16000")  # ~16 MB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=5000")
 
 
 def get_connection():
-    """Return a persistent SQLite connection, initializing tables if needed."""
-    global _conn
-    if _conn is None:
-        _conn = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES)
-        _conn.row_factory = sqlite3.Row
-        init_db(_conn)
-    return _conn
+    """Return this thread's persistent SQLite connection, initializing tables if needed."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_FILE) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+        init_db(conn)
+        _local.conn = conn
+    return conn
+
+
+def open_readonly_connection():
+    """Give the calling thread a read-only connection (used by the async read pool)."""
+    conn = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA cache_size=-16000")
+    conn.execute("PRAGMA busy_timeout=5000")
+    _local.conn = conn
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Commit on success / roll back on error, like `with conn:`. Inside a group
+    commit (db_async's writer) it only joins the batch's open transaction.
+    """
+    if getattr(_local, "group_commit", False):
+        yield conn
+    else:
+        with conn:
+            yield conn
+
+
+@contextmanager
+def group_commit(conn):
+    """
+    Run several write functions in one transaction. Checklist listeners are
+    deferred until the commit succeeds.
+    """
+    _local.group_commit = True
+    _local.after_commit = []
+    try:
+        conn.execute("BEGIN")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        pending = _local.after_commit
+    finally:
+        _local.group_commit = False
+        _local.after_commit = []
+    for callback, observations in pending:
+        callback(observations)
+
+
+def pending_notifications() -> int:
+    """Number of listener calls queued in the current group commit."""
+    return len(getattr(_local, "after_commit", []))
+
+
+def discard_notifications(keep: int):
+    """Drop listener calls queued after the first `keep` (the job that queued them was rolled back)."""
+    if getattr(_local, "group_commit", False):
+        del _local.after_commit[keep:]
+
+
+def _notify_checklists(observations):
+    for callback in _checklist_listeners:
+        if getattr(_local, "group_commit", False):
+            _local.after_commit.append((callback, observations))
+        else:
+            callback(observations)
 
 
 # --------------------
@@ -24,7 +116,7 @@ def get_connection():
 # --------------------
 def save_thread(thread: ThreadRecord):
     conn = get_connection()
-    with conn:
+    with transaction(conn):
         conn.execute("""
             INSERT INTO threads (tracker_key, thread_id, type, last_seen_at, status_bucket)
             VALUES (?, ?, ?, ?, ?)
@@ -66,19 +158,41 @@ def save_checklist(obs: Observation, lat: float | None = None, lon: float | None
     if lat is not None and lon is not None:
         obs.obs_datetime = ebird_local_to_utc(obs.obs_datetime.strftime("%Y-%m-%d %H:%M"), lat, lon)
 
+    save_checklists([obs])
+
+
+def save_checklists(observations: list[Observation]) -> int:
+    """
+    Upsert a batch of checklists in a single transaction.
+    obs_datetime must already be UTC. Returns the number of rows written.
+    """
+    rows = [(obs.checklist_id, obs.species, obs.region, obs.observer,
+             obs.obs_datetime.isoformat(), obs.thread_tracker_key,
+             obs.location, obs.lat, obs.lon, obs.local_tz)
+            for obs in observations]
+    if not rows:
+        return 0
+
     conn = get_connection()
-    with conn:
-        conn.execute("""
-            INSERT INTO checklists (checklist_id, species, region, observer, obs_datetime, thread_tracker_key)
-            VALUES (?, ?, ?, ?, ?, ?)
+    with transaction(conn):
+        conn.executemany("""
+            INSERT INTO checklists (checklist_id, species, region, observer, obs_datetime, thread_tracker_key,
+                                    location, lat, lon, local_tz)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(checklist_id) DO UPDATE SET
                 species=excluded.species,
                 region=excluded.region,
                 observer=excluded.observer,
                 obs_datetime=excluded.obs_datetime,
-                thread_tracker_key=excluded.thread_tracker_key
-        """, (obs.checklist_id, obs.species, obs.region, obs.observer,
-              obs.obs_datetime.isoformat(), obs.thread_tracker_key))
+                thread_tracker_key=excluded.thread_tracker_key,
+                location=excluded.location,
+                lat=excluded.lat,
+                lon=excluded.lon,
+                local_tz=excluded.local_tz
+        """, rows)
+
+    _notify_checklists(observations)
+    return len(rows)
 
 
 def get_checklists_for_thread(tracker_key: str) -> list[Observation]:
@@ -92,9 +206,13 @@ def row_to_observation(row) -> Observation:
         checklist_id=row["checklist_id"],
         species=row["species"],
         region=row["region"],
+        location=row["location"] or "Unknown",
         observer=row["observer"],
         obs_datetime=datetime.fromisoformat(row["obs_datetime"]),
-        thread_tracker_key=row["thread_tracker_key"]
+        local_tz=row["local_tz"] or "UTC",
+        thread_tracker_key=row["thread_tracker_key"],
+        lat=row["lat"],
+        lon=row["lon"]
     )
 
 
@@ -103,7 +221,7 @@ def row_to_observation(row) -> Observation:
 # --------------------
 def save_pending_checklist(mod: ChecklistModeration):
     conn = get_connection()
-    with conn:
+    with transaction(conn):
         conn.execute("""
             INSERT INTO moderation_queue (checklist_id, species, region, submitted_by, submitted_at, status, moderated_by)
             VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -126,7 +244,7 @@ def get_pending_moderation() -> list[ChecklistModeration]:
 
 def update_moderation_status(checklist_id: str, status: str, moderated_by: str):
     conn = get_connection()
-    with conn:
+    with transaction(conn):
         conn.execute("""
             UPDATE moderation_queue
             SET status=?, moderated_by=?
@@ -151,7 +269,7 @@ def row_to_moderation(row) -> ChecklistModeration:
 # --------------------
 def save_missed(missed: MissedObservation):
     conn = get_connection()
-    with conn:
+    with transaction(conn):
         conn.execute("""
             INSERT INTO misses (observer, region, species, missed_at, thread_tracker_key)
             VALUES (?, ?, ?, ?, ?)
@@ -175,6 +293,52 @@ def row_to_missed(row) -> MissedObservation:
     )
 
 
+# --------------------
+# Posted Cluster Functions
+# --------------------
+def save_posted_clusters(posted: list[PostedCluster]) -> int:
+    if not posted:
+        return 0
+    conn = get_connection()
+    with transaction(conn):
+        conn.executemany("""
+            INSERT INTO posted_clusters (region, cluster_id, fingerprint, channel_id, message_id, posted_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(region, cluster_id) DO UPDATE SET
+                fingerprint=excluded.fingerprint,
+                channel_id=excluded.channel_id,
+                message_id=excluded.message_id,
+                posted_at=excluded.posted_at
+        """, [(p.region, p.cluster_id, p.fingerprint, p.channel_id, p.message_id, p.posted_at.isoformat())
+              for p in posted])
+    return len(posted)
+
+
+def get_posted_clusters(region: str) -> dict[str, PostedCluster]:
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM posted_clusters WHERE region=?", (region,)).fetchall()
+    return {r["cluster_id"]: row_to_posted_cluster(r) for r in rows}
+
+
+def prune_posted_clusters(before: datetime) -> int:
+    """Forget clusters last posted before `before`; they are long out of the RBA window."""
+    conn = get_connection()
+    with transaction(conn):
+        cur = conn.execute("DELETE FROM posted_clusters WHERE posted_at < ?", (before.isoformat(),))
+    return cur.rowcount
+
+
+def row_to_posted_cluster(row) -> PostedCluster:
+    return PostedCluster(
+        region=row["region"],
+        cluster_id=row["cluster_id"],
+        fingerprint=row["fingerprint"],
+        channel_id=row["channel_id"],
+        message_id=row["message_id"],
+        posted_at=datetime.fromisoformat(row["posted_at"])
+    )
+
+
 # --------------------
 # Utilities
 # --------------------
@@ -182,19 +346,15 @@ def get_all_county_regions():
     """
     Returns a list of dicts: [{"code": "US-CO-013", "name": "El Paso"}, ...]
     """
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT code, name FROM regions WHERE code LIKE 'US-CO-%'")
-    rows = cur.fetchall()
-    conn.close()
-    return [{"code": r[0], "name": r[1]} for r in rows]
+    from region_registry import get_registry  # registry imports db
+    return get_registry().counties()
 
 
 def close_connection():
-    global _conn
-    if _conn is not None:
-        _conn.close()
-        _conn = None
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
 
 
 def get_checklist(checklist_id: str) -> Observation | None:
@@ -209,7 +369,53 @@ def get_all_threads() -> list[ThreadRecord]:
     return [row_to_thread(r) for r in rows]
 
 
+def get_latest_sightings(region_code: str | None = None) -> list[tuple[ThreadRecord, datetime | None]]:
+    """
+    Return every thread (or, for `region_code`, those with checklists in it) with the
+    newest checklist time linked to it, in one aggregate query.
+    obs_datetime is stored as UTC ISO text, so MAX() orders it correctly.
+    """
+    conn = get_connection()
+    if region_code is None:
+        rows = conn.execute("""
+            SELECT t.*, MAX(c.obs_datetime) AS latest_obs
+            FROM threads t
+            LEFT JOIN checklists c ON c.thread_tracker_key = t.tracker_key
+            GROUP BY t.tracker_key
+        """).fetchall()
+    else:
+        # Driven by the (region, obs_datetime) index; threads with no checklists in
+        # the region have nothing to reclassify and are left to the full rebuild
+        rows = conn.execute("""
+            SELECT t.*, MAX(c.obs_datetime) AS latest_obs
+            FROM checklists c
+            JOIN threads t ON t.tracker_key = c.thread_tracker_key
+            WHERE c.region = ?
+            GROUP BY t.tracker_key
+        """, (region_code,)).fetchall()
+    return [(row_to_thread(r), datetime.fromisoformat(r["latest_obs"]) if r["latest_obs"] else None)
+            for r in rows]
+
+
+def get_latest_sighting(tracker_key: str) -> datetime | None:
+    conn = get_connection()
+    row = conn.execute("SELECT MAX(obs_datetime) FROM checklists WHERE thread_tracker_key=?",
+                       (tracker_key,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+
+def update_thread_buckets(changes: list[tuple[str, str]]) -> int:
+    """Write (tracker_key, status_bucket) pairs in one transaction."""
+    if not changes:
+        return 0
+    conn = get_connection()
+    with transaction(conn):
+        conn.executemany("UPDATE threads SET status_bucket=? WHERE tracker_key=?",
+                         [(bucket, key) for key, bucket in changes])
+    return len(changes)
+
+
 def delete_thread(tracker_key: str):
     conn = get_connection()
-    with conn:
+    with transaction(conn):
         conn.execute("DELETE FROM threads WHERE tracker_key=?", (tracker_key,))
@@ -0,0 +1,174 @@
+# db_async.py
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import db
+from metrics import metrics
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+DB_COMMIT_WINDOW = float(os.getenv("DB_COMMIT_WINDOW", "0.005"))  # seconds to gather writes into one commit
+DB_MAX_BATCH = int(os.getenv("DB_MAX_BATCH", "200"))
+DB_READERS = int(os.getenv("DB_READERS", "2"))
+
+_STOP = object()
+
+
+class AsyncDatabase:
+    """
+    Awaitable facade over the synchronous functions in db.py.
+
+    Writes are queued to one writer thread, which group-commits every write
+    arriving within DB_COMMIT_WINDOW in a single transaction (each job in its
+    own savepoint, so one failure does not sink the batch). Reads run on a
+    small pool of read-only connections. Neither blocks the event loop.
+
+        await database.write(db.save_checklists, observations)
+        thread = await database.read(db.get_thread, tracker_key)
+    """
+
+    def __init__(self, readers: int = DB_READERS, commit_window: float = DB_COMMIT_WINDOW,
+                 max_batch: int = DB_MAX_BATCH):
+        self.readers = readers
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._reader_pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._ready: threading.Event | None = None
+        self._errors: list = []
+        self.commits = 0
+        self.writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and self._writer.is_alive()
+
+    async def start(self):
+        """
+        Start the writer thread (creating/migrating the DB) and the read pool.
+        The loop keeps running while the writer opens the database.
+        """
+        with self._lock:
+            if not self.running:
+                self._ready = threading.Event()
+                self._errors = []
+                self._writer = threading.Thread(target=self._writer_main, args=(self._ready, self._errors),
+                                                name="db-writer", daemon=True)
+                self._writer.start()
+            ready, errors = self._ready, self._errors
+        if not ready.is_set():
+            await asyncio.to_thread(ready.wait)
+        if errors:
+            raise errors[0]
+        with self._lock:
+            if self._reader_pool is None:
+                self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader",
+                                                       initializer=db.open_readonly_connection)
+
+    async def stop(self):
+        if self.running:
+            self._queue.put(_STOP)
+            await asyncio.to_thread(self._writer.join)
+        self._writer = None
+        if self._reader_pool is not None:
+            self._reader_pool.shutdown(wait=False)
+            self._reader_pool = None
+
+    async def write(self, fn, *args, **kwargs):
+        """Run a db.py write function on the writer thread and await its result."""
+        if not self.running:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((partial(fn, *args, **kwargs), loop, future))
+        with metrics.timed("db_write_seconds", fn=fn.__name__):
+            return await future
+
+    async def read(self, fn, *args, **kwargs):
+        """Run a db.py query function on a read-only connection and await its result."""
+        if not self.running or self._reader_pool is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        with metrics.timed("db_read_seconds", fn=fn.__name__):
+            return await loop.run_in_executor(self._reader_pool, partial(fn, *args, **kwargs))
+
+    # --------------------
+    # Writer thread
+    # --------------------
+    def _writer_main(self, ready: threading.Event, errors: list):
+        try:
+            conn = db.get_connection()
+        except Exception as e:
+            errors.append(e)
+            ready.set()
+            return
+        ready.set()
+
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            batch = [job]
+            deadline = time.monotonic() + self.commit_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._run_batch(conn, batch)
+
+        db.close_connection()
+
+    def _run_batch(self, conn, batch):
+        results = []
+        try:
+            with db.group_commit(conn):
+                for fn, loop, future in batch:
+                    notified = db.pending_notifications()
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        results.append((loop, future, fn(), None))
+                        conn.execute("RELEASE job")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                        # Listeners must not hear about checklists the rollback just undid
+                        db.discard_notifications(notified)
+                        results.append((loop, future, None, e))
+            self.commits += 1
+            self.writes += len(batch)
+        except Exception as e:
+            logger.error(f"DB group commit of {len(batch)} writes failed: {e}")
+            results = [(loop, future, None, e) for _, loop, future in batch]
+
+        for loop, future, result, error in results:
+            loop.call_soon_threadsafe(_resolve, future, result, error)
+
+
+def _resolve(future: asyncio.Future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+database = AsyncDatabase()
+metrics.register("db_commits_total", lambda: database.commits, kind="counter")
+metrics.register("db_writes_total", lambda: database.writes, kind="counter")
@@ -51,13 +51,97 @@ CREATE TABLE IF NOT EXISTS misses (
 );
 """
 
+# Regions table (eBird subnational2 regions, filled by co_county_lookup)
+REGIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS regions (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT
+);
+"""
+
+
+# Clusters already posted to county channels (delta posting)
+POSTED_CLUSTERS_TABLE = """
+CREATE TABLE IF NOT EXISTS posted_clusters (
+    region TEXT NOT NULL,
+    cluster_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    posted_at TEXT NOT NULL,
+    PRIMARY KEY (region, cluster_id)
+);
+"""
+
+
+def add_column(table: str, column: str, decl: str):
+    """Migration step that adds a column unless it is already there."""
+    def step(connection):
+        existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return step
+
+
+# Ordered schema migrations: (version, steps). Each step is SQL or a callable
+# taking the connection. Applied versions are tracked in PRAGMA user_version;
+# only ever append new versions, never edit released ones.
+MIGRATIONS = [
+    (1, [THREADS_TABLE, CHECKLISTS_TABLE, MODERATION_QUEUE_TABLE, MISSES_TABLE, REGIONS_TABLE]),
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_checklists_thread ON checklists(thread_tracker_key)",
+        "CREATE INDEX IF NOT EXISTS idx_checklists_region_time ON checklists(region, obs_datetime)",
+        "CREATE INDEX IF NOT EXISTS idx_misses_thread ON misses(thread_tracker_key)",
+        "CREATE INDEX IF NOT EXISTS idx_moderation_status ON moderation_queue(status)",
+    ]),
+    (3, [
+        add_column("checklists", "location", "TEXT"),
+        add_column("checklists", "lat", "REAL"),
+        add_column("checklists", "lon", "REAL"),
+        add_column("checklists", "local_tz", "TEXT"),
+    ]),
+    (4, [
+        POSTED_CLUSTERS_TABLE,
+        "CREATE INDEX IF NOT EXISTS idx_posted_clusters_message ON posted_clusters(message_id)",
+    ]),
+    (5, [
+        add_column("regions", "updated_at", "TEXT"),  # when the row was last refreshed from eBird
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection, target: int = SCHEMA_VERSION) -> int:
+    """Apply every migration newer than the database's user_version, each in its own transaction."""
+    current = get_schema_version(connection)
+    for version, steps in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        connection.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(connection)
+                else:
+                    connection.execute(step)
+            connection.execute(f"PRAGMA user_version = {version}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        current = version
+    return current
+
+
 # Helper function to initialize all tables
 def init_db(connection):
-    with connection:
-        connection.execute(THREADS_TABLE)
-        connection.execute(CHECKLISTS_TABLE)
-        connection.execute(MODERATION_QUEUE_TABLE)
-        connection.execute(MISSES_TABLE)
+    migrate(connection)
 
 # Run when executed directly
 if __name__ == "__main__":
@@ -65,5 +149,6 @@ if __name__ == "__main__":
     conn = sqlite3.connect(db_file)
     print(f"Initializing database at {db_file}...")
     init_db(conn)
+    print(f"Schema at version {get_schema_version(conn)}")
     conn.close()
     print("Done.")
@@ -1,121 +1,133 @@
+import time
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from math import radians, sin, cos, sqrt, atan2
-from zoneinfo import ZoneInfo
+from typing import Iterator
+from clustering import cluster_observations, haversine, normalize_species_name
+from metrics import metrics
+from time_utils import get_zone
 
 MAX_DISCORD_MSG_LEN = 2000
 RECENT_HOURS = 24
+MAX_LISTED_OBSERVERS = 10
 
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+def _observer_link(o) -> str:
+    return f"[{o.observer}](<https://ebird.org/checklist/{o.checklist_id}>)" + (" 📷" if o.has_media else "")
 
-def normalize_species_name(name: str) -> str:
-    base = name.split("(")[0].strip()
-    return "".join(c.lower() for c in base if c.isalnum() or c.isspace())
+def recent_observations(obs_list, cutoff: datetime) -> list:
+    """Observations at or after `cutoff`, newest first."""
+    return [o for o in sorted(obs_list, key=lambda o: o.obs_datetime, reverse=True) if o.obs_datetime >= cutoff]
 
-def cluster_observations(observations, threshold_km=2):
-    clusters = {}  # key -> list[obs]
-
-    for obs in observations:
-        norm_name = normalize_species_name(obs.species)
-        lat, lon = obs.lat, obs.lon
-
-        match_key = None
-        for (sp, clat, clon, loc) in clusters.keys():
-            if normalize_species_name(sp) != norm_name:
-                continue
-            if haversine(lat, lon, clat, clon) <= threshold_km:
-                match_key = (sp, clat, clon, loc)
-                break
+def render_cluster(key, recent_obs: list, limit: int = MAX_DISCORD_MSG_LEN) -> list[str]:
+    """
+    Render one species@location cluster from its recent observations (newest
+    first) as message lines ending with a blank separator line. No line is
+    longer than `limit`; a long observer list is continued on extra lines.
+    """
+    species_name, lat, lon, location = key
+    most_recent = recent_obs[0]
+
+    local_dt = most_recent.obs_datetime.astimezone(get_zone(most_recent.local_tz))
+    first_dt = local_dt.strftime("%Y-%m-%d %H:%M")
+    first_link = f"https://ebird.org/checklist/{most_recent.checklist_id}"
+    media_icon = "📷" if most_recent.has_media else ""
+
+    block_lines: list[str] = [
+        f"__**{species_name}**__ @ [{location}](<https://www.google.com/maps/search/?api=1&query={lat},{lon}>) {media_icon}",
+        f"▸ [{first_dt}](<{first_link}>) by [{most_recent.observer}](<{first_link}>) {media_icon}",
+    ]
+
+    # Additional observers in last 24 hours (recent_obs is already newest first)
+    seen = set()
+    unique_recent = []
+    for o in recent_obs:
+        if o != most_recent and o.observer not in seen:
+            unique_recent.append(o)
+            seen.add(o.observer)
+
+    if unique_recent:
+        displayed = unique_recent[:MAX_LISTED_OBSERVERS]
+        more_count = len(unique_recent) - len(displayed)
+        parts = [_observer_link(o) for o in displayed]
+        if more_count:
+            parts.append(f"and {more_count} more")
+
+        line = "▸ Also reported in last 24 hours by: " + parts[0]
+        for part in parts[1:]:
+            if len(line) + len(part) + 2 >= limit:
+                # Continue the observer list on a new line rather than overflow the message
+                block_lines.append(line + ",")
+                line = "▸ … " + part
+            else:
+                line += ", " + part
+        block_lines.append(line)
+
+    block_lines.append("")  # blank line between clusters
+    return [l if len(l) < limit else l[: limit - 2] + "…" for l in block_lines]
+
+def iter_rendered_clusters(observations: list, limit: int = MAX_DISCORD_MSG_LEN):
+    """Yield (key, recent_obs, lines) per cluster with recent activity, in posting order."""
+    with metrics.timed("rba_stage_seconds", stage="cluster"):
+        clusters = cluster_observations(observations)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=RECENT_HOURS)
+    rendering = 0.0  # only time spent here, not in the consumer between yields
+    try:
+        for key in sorted(clusters.keys()):
+            start = time.perf_counter()
+            recent_obs = recent_observations(clusters[key], cutoff)
+            lines = render_cluster(key, recent_obs, limit) if recent_obs else None
+            rendering += time.perf_counter() - start
+            if lines:  # skip clusters with nothing recent
+                yield key, recent_obs, lines
+    finally:
+        metrics.observe("rba_stage_seconds", rendering, stage="render")
+
+def pack_messages(blocks, limit: int = MAX_DISCORD_MSG_LEN):
+    """
+    Pack (tag, lines) blocks into messages of at most `limit` chars, yielding
+    (text, tags) as soon as each message is full. A block stays in one message
+    unless it alone exceeds the limit, in which case it is split between lines.
+    """
+    current_lines: list[str] = []
+    current_tags: list = []
+    current_size = 0  # running sum of len(line) + 1
 
-        if match_key:
-            clusters[match_key].append(obs)
-        else:
-            key = (obs.species, lat, lon, obs.location or "Unknown")
-            clusters[key] = [obs]
+    for tag, block_lines in blocks:
+        block_size = sum(len(line) + 1 for line in block_lines)
+        if current_lines and current_size + block_size > limit:
+            yield "\n".join(current_lines), current_tags
+            current_lines, current_tags, current_size = [], [], 0
+
+        current_tags.append(tag)
+        if block_size <= limit:
+            current_lines.extend(block_lines)
+            current_size += block_size
+            continue
+
+        for line in block_lines:
+            if current_lines and current_size + len(line) + 1 > limit:
+                yield "\n".join(current_lines), current_tags
+                current_lines, current_tags, current_size = [], [tag], 0
+            current_lines.append(line)
+            current_size += len(line) + 1
 
-    return clusters
+    if current_lines:
+        yield "\n".join(current_lines), current_tags
 
-def chunked_rba_messages(observations: list) -> list[str]:
+def iter_rba_messages(observations: list, limit: int = MAX_DISCORD_MSG_LEN) -> Iterator[str]:
     """
-    Build Discord messages (<=2000 chars) showing:
+    Yield Discord messages (<=2000 chars) as soon as each one is full, showing:
       - most recent checklist per clustered species@location
       - 'Also reported in last 24 hours by' if additional observers
       - 📷 icon for media
     """
     if not observations:
-        return ["No notable observations in this region."]
-
-    clusters = cluster_observations(observations)
-    messages: list[str] = []
-    current_lines: list[str] = []
-
-    now_utc = datetime.now(timezone.utc)
-    cutoff = now_utc - timedelta(hours=RECENT_HOURS)
-
-    for (species_name, lat, lon, location) in sorted(clusters.keys()):
-        obs_list = clusters[(species_name, lat, lon, location)]
-        # Sort newest → oldest
-        obs_sorted = sorted(obs_list, key=lambda o: o.obs_datetime, reverse=True)
-
-        # Filter to recent obs
-        recent_obs = [o for o in obs_sorted if o.obs_datetime >= cutoff]
-        if not recent_obs:
-            continue  # skip clusters with nothing recent
-
-        most_recent = recent_obs[0]
-
-        local_dt = most_recent.obs_datetime.astimezone(ZoneInfo(most_recent.local_tz))
-        first_dt = local_dt.strftime("%Y-%m-%d %H:%M")
-        first_link = f"https://ebird.org/checklist/{most_recent.checklist_id}"
-        media_icon = "📷" if most_recent.has_media else ""
-
-        block_lines: list[str] = []
-        block_lines.append(
-            f"__**{species_name}**__ @ [{location}](<https://www.google.com/maps/search/?api=1&query={lat},{lon}>) {media_icon}"
-        )
-        block_lines.append(
-            f"▸ [{first_dt}](<{first_link}>) by [{most_recent.observer}](<{first_link}>) {media_icon}"
-        )
-
-        # Additional observers in last 24 hours
-        recent_others = [o for o in recent_obs if o != most_recent]
-        recent_others_sorted = sorted(recent_others, key=lambda o: o.obs_datetime, reverse=True)
-        if recent_others:
-            seen = set()
-            unique_recent = []
-            for o in recent_others_sorted:
-                if o.observer not in seen:
-                    unique_recent.append(o)
-                    seen.add(o.observer)
-
-            displayed = unique_recent[:10]
-            more_count = max(0, len(unique_recent) - len(displayed))
-
-            observers_str = ", ".join(
-                f"[{o.observer}](<https://ebird.org/checklist/{o.checklist_id}>)" + (" 📷" if o.has_media else "")
-                for o in displayed
-            )
-            line = f"▸ Also reported in last 24 hours by: {observers_str}"
-            if more_count:
-                line += f", and {more_count} more"
-            block_lines.append(line)
-
-        block_lines.append("")  # blank line between clusters
-
-        # Keep cluster together in one message
-        block_size = sum(len(line) + 1 for line in block_lines)
-        if sum(len(l) + 1 for l in current_lines) + block_size > MAX_DISCORD_MSG_LEN:
-            messages.append("\n".join(current_lines))
-            current_lines = []
-
-        current_lines.extend(block_lines)
+        yield "No notable observations in this region."
+        return
 
-    if current_lines:
-        messages.append("\n".join(current_lines))
+    blocks = ((key, lines) for key, _, lines in iter_rendered_clusters(observations, limit))
+    for text, _ in pack_messages(blocks, limit):
+        yield text
 
-    return messages
+def chunked_rba_messages(observations: list) -> list[str]:
+    """All messages from iter_rba_messages as a list."""
+    return list(iter_rba_messages(observations))
@@ -1,31 +1,67 @@
 # ebird_api.py
-import time
-import requests
-from datetime import datetime
-from models import Observation
 import os
 from dotenv import load_dotenv
+from ebird_client import get_client
+from ebird_cache import AsyncTTLCache
+from metrics import metrics
 
+# A missing or invalid EBIRD_TOKEN surfaces as EBirdAuthError from the client on first use
 load_dotenv()
-EBIRD_TOKEN = os.getenv("EBIRD_TOKEN")
-if not EBIRD_TOKEN:
-    raise RuntimeError("EBIRD_TOKEN not set in .env")
-
-def fetch_ebird_rba(region_code, retries=3, delay=5):
-    url = f"https://api.ebird.org/v2/data/obs/{region_code}/recent/notable?detail=full&back=2&maxResults=200"
-    headers = {"X-eBirdApiToken": EBIRD_TOKEN}
-    
-    for attempt in range(retries):
-        try:
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-            return res.json()
-        except requests.exceptions.HTTPError as e:
-            if 500 <= res.status_code < 600:
-                # Server error, wait and retry
-                print(f"Server error {res.status_code}, retrying in {delay}s...")
-                time.sleep(delay)
-            else:
-                # Client error, re-raise
-                raise
-    raise RuntimeError(f"Failed to fetch data for {region_code} after {retries} attempts")
+
+RBA_CACHE_TTL = float(os.getenv("RBA_CACHE_TTL", "600"))  # seconds
+RBA_CACHE_SIZE = int(os.getenv("RBA_CACHE_SIZE", "128"))  # regions
+
+# Upper bound for the single statewide request; eBird caps maxResults at 10000
+STATEWIDE_MAX_RESULTS = int(os.getenv("RBA_STATEWIDE_MAX_RESULTS", "10000"))
+
+notable_cache = AsyncTTLCache(ttl=RBA_CACHE_TTL, maxsize=RBA_CACHE_SIZE)
+metrics.register("rba_cache_hits_total", lambda: notable_cache.hits, kind="counter")
+metrics.register("rba_cache_misses_total", lambda: notable_cache.misses, kind="counter")
+metrics.register("rba_cache_coalesced_total", lambda: notable_cache.coalesced, kind="counter")
+
+async def fetch_ebird_rba(region_code, back=2, max_results=200, refresh=False):
+    """
+    Fetch recent notable observations (raw eBird dicts) for a region.
+
+    Responses are cached per region for RBA_CACHE_TTL seconds and shared
+    between !rba and scheduled runs. Pass refresh=True to bypass and re-warm
+    the cache. The returned list is shared, so callers must not mutate it.
+    """
+    return await notable_cache.get_or_fetch(
+        (region_code, back, max_results),
+        lambda: get_client().notable_observations(region_code, back=back, max_results=max_results),
+        refresh=refresh,
+    )
+
+async def fetch_statewide_rba(region_codes, state_code="US-CO", back=2, max_results=200):
+    """
+    Fetch notable observations for the whole state in one request and split
+    them into per-county buckets keyed by `subnational2Code`.
+
+    Returns (buckets, fallback_codes): `buckets` maps every requested county
+    code to its observations (possibly empty), and `fallback_codes` lists the
+    counties that must be fetched individually instead. The notable endpoint
+    has no paging offset, so when the statewide response fills
+    STATEWIDE_MAX_RESULTS the oldest sightings of any county may be cut off
+    and every county is handed back for a per-county fetch.
+    Each complete bucket also warms the per-county cache used by !rba.
+    """
+    region_codes = list(region_codes)
+    rows = await notable_cache.get_or_fetch(
+        (state_code, back, STATEWIDE_MAX_RESULTS),
+        lambda: get_client().notable_observations(state_code, back=back, max_results=STATEWIDE_MAX_RESULTS),
+        refresh=True,
+    )
+    if len(rows) >= STATEWIDE_MAX_RESULTS:
+        return {}, region_codes
+
+    buckets = {code: [] for code in region_codes}
+    for row in rows:
+        bucket = buckets.get(row.get("subnational2Code"))
+        if bucket is not None:
+            bucket.append(row)
+
+    for code, bucket in buckets.items():
+        notable_cache.set((code, back, max_results), bucket)
+
+    return buckets, []
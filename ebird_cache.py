@@ -0,0 +1,79 @@
+# ebird_cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    """
+    Bounded LRU cache whose entries expire after `ttl` seconds, with
+    single-flight loading: concurrent misses for the same key share one
+    in-flight fetch instead of each calling the API.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: dict = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0  # lookups that started a fetch
+        self.coalesced = 0  # lookups that joined a fetch already in flight
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key=_MISSING):
+        if key is _MISSING:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key, fetch, refresh: bool = False):
+        """
+        Return the cached value for `key`, or await `fetch()` to load it.
+        With `refresh=True` the cached value is ignored and replaced, which is
+        how scheduled runs warm the cache for later lookups.
+        """
+        if not refresh:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller does not cancel the fetch others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key, fetch):
+        try:
+            value = await fetch()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,252 @@
+# ebird_client.py
+import asyncio
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+import aiohttp
+from dotenv import load_dotenv
+from json_stream import aiter_json_array
+from metrics import metrics
+from rate_limit import RequestLog, TokenBucket
+
+load_dotenv()
+EBIRD_TOKEN = os.getenv("EBIRD_TOKEN")
+EBIRD_API_BASE = os.getenv("EBIRD_API_BASE", "https://api.ebird.org/v2")
+
+# Shared request budget for commands and scheduled runs
+EBIRD_RATE_PER_SEC = float(os.getenv("EBIRD_RATE_PER_SEC", "5"))
+EBIRD_BURST = float(os.getenv("EBIRD_BURST", "10"))
+EBIRD_MAX_RETRIES = int(os.getenv("EBIRD_MAX_RETRIES", "3"))
+EBIRD_POOL_SIZE = int(os.getenv("EBIRD_POOL_SIZE", "10"))
+EBIRD_TIMEOUT = float(os.getenv("EBIRD_TIMEOUT", "30"))
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+
+# --------------------
+# Errors
+# --------------------
+class EBirdError(Exception):
+    """Base class for eBird API failures."""
+
+    def __init__(self, message: str, status: int | None = None, url: str | None = None):
+        super().__init__(message)
+        self.status = status
+        self.url = url
+
+
+class EBirdAuthError(EBirdError):
+    """Token missing, invalid or not allowed (401/403)."""
+
+
+class EBirdRequestError(EBirdError):
+    """The request itself was rejected, e.g. an unknown region (other 4xx)."""
+
+
+class EBirdRateLimitError(EBirdError):
+    """Still throttled (429) after all retries."""
+
+    def __init__(self, message: str, status: int | None = None, url: str | None = None,
+                 retry_after: float | None = None):
+        super().__init__(message, status, url)
+        self.retry_after = retry_after
+
+
+class EBirdServerError(EBirdError):
+    """eBird kept answering 5xx after all retries."""
+
+
+class EBirdConnectionError(EBirdError):
+    """Network failure or timeout after all retries."""
+
+
+# Who a request is made for; set around a call to attribute its HTTP requests (retries included)
+request_source: ContextVar[str] = ContextVar("ebird_request_source", default="other")
+
+
+# --------------------
+# Client
+# --------------------
+class EBirdClient:
+    """
+    Async eBird API client.
+
+    One pooled keep-alive session is shared by every call, requests draw from a
+    single token bucket, and transient failures (5xx, 429, network errors) are
+    retried with exponential backoff and full jitter.
+    """
+
+    def __init__(self, token: str | None = EBIRD_TOKEN, base_url: str = EBIRD_API_BASE,
+                 rate_per_sec: float = EBIRD_RATE_PER_SEC, burst: float = EBIRD_BURST,
+                 max_retries: int = EBIRD_MAX_RETRIES, backoff_base: float = 1.0,
+                 backoff_cap: float = 30.0, timeout: float = EBIRD_TIMEOUT,
+                 pool_size: int = EBIRD_POOL_SIZE):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.requests = RequestLog()  # every HTTP attempt in the last 24h, by request_source
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-eBirdApiToken": self.token or ""},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                raise_for_status=False,
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def get_json(self, path: str, params: dict | None = None, endpoint: str | None = None):
+        """
+        GET `path` (relative to the API base) and return the decoded JSON body.
+        `endpoint` names the call in metrics; it defaults to the path.
+        """
+        return await self._request(path, params, endpoint, lambda res: res.json(content_type=None))
+
+    async def stream_json_array(self, path: str, on_batch, params: dict | None = None,
+                                endpoint: str | None = None, on_restart=None, batch_size: int = 1000) -> int:
+        """
+        GET `path`, whose body is a JSON array, and await `on_batch(items)` for
+        every `batch_size` elements as they are parsed off the wire, so the
+        full document is never held in memory. If a retry restarts the
+        download after some batches were delivered, `on_restart()` is awaited
+        first. Returns the number of elements delivered.
+        """
+        delivered = 0
+
+        async def read(res):
+            nonlocal delivered
+            if delivered and on_restart is not None:
+                await on_restart()
+            delivered = 0
+            batch = []
+            async for item in aiter_json_array(res.content.iter_chunked(1 << 16)):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    await on_batch(batch)
+                    delivered += len(batch)
+                    batch = []
+            if batch:
+                await on_batch(batch)
+                delivered += len(batch)
+            return delivered
+
+        return await self._request(path, params, endpoint, read)
+
+    async def _request(self, path: str, params: dict | None, endpoint: str | None, read):
+        """GET with throttling and retries; `read(response)` consumes a successful response."""
+        if not self.token:
+            raise EBirdAuthError("EBIRD_TOKEN not set in .env")
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = endpoint or path
+        session = self._get_session()
+
+        for attempt in range(self.max_retries + 1):
+            waited = await self.bucket.acquire()
+            metrics.observe("ebird_throttle_seconds", waited)
+            retry_after = None
+            start = time.perf_counter()
+            self.requests.add(request_source.get())
+            try:
+                async with session.get(url, params=params) as res:
+                    metrics.inc("ebird_requests_total", endpoint=endpoint, status=res.status)
+                    if res.status < 400:
+                        try:
+                            data = await read(res)
+                        except ValueError as e:
+                            # Truncated or non-JSON body (e.g. an HTML error page sent with a 200)
+                            error = EBirdServerError(f"eBird sent an unreadable response: {e}", res.status, url)
+                        else:
+                            metrics.observe("ebird_request_seconds", time.perf_counter() - start,
+                                            endpoint=endpoint)
+                            return data
+                    elif res.status in (401, 403):
+                        raise EBirdAuthError(f"eBird rejected the API token ({res.status})", res.status, url)
+                    elif res.status == 429:
+                        retry_after = _parse_retry_after(res.headers.get("Retry-After"))
+                        error = EBirdRateLimitError(f"eBird rate limit hit ({res.status})", res.status, url,
+                                                    retry_after=retry_after)
+                    elif res.status >= 500:
+                        error = EBirdServerError(f"eBird server error ({res.status})", res.status, url)
+                    else:
+                        text = await res.text()
+                        raise EBirdRequestError(f"eBird request failed ({res.status}): {text[:200]}", res.status, url)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                metrics.inc("ebird_requests_total", endpoint=endpoint, status="error")
+                error = EBirdConnectionError(f"eBird request failed: {e!r}", None, url)
+
+            if attempt == self.max_retries:
+                raise error
+
+            metrics.inc("ebird_retries_total", endpoint=endpoint)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            logger.warning(f"{error} for {url}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    # --------------------
+    # Endpoints
+    # --------------------
+    async def notable_observations(self, region_code: str, back: int = 2, max_results: int = 200,
+                                   detail: str = "full") -> list[dict]:
+        return await self.get_json(
+            f"data/obs/{region_code}/recent/notable",
+            {"detail": detail, "back": back, "maxResults": max_results},
+            endpoint="notable",
+        )
+
+    async def taxonomy(self, locale: str = "en") -> list[dict]:
+        return await self.get_json("ref/taxonomy/ebird", {"locale": locale, "fmt": "json"}, endpoint="taxonomy")
+
+    async def stream_taxonomy(self, on_batch, on_restart=None, locale: str = "en") -> int:
+        """Like taxonomy(), but hands the entries to `on_batch` in batches as they download."""
+        return await self.stream_json_array("ref/taxonomy/ebird", on_batch, {"locale": locale, "fmt": "json"},
+                                            endpoint="taxonomy", on_restart=on_restart)
+
+    async def taxonomy_versions(self) -> list[dict]:
+        return await self.get_json("ref/taxonomy/versions", endpoint="taxonomy_versions")
+
+    async def subnational2_regions(self, parent_region: str) -> list[dict]:
+        return await self.get_json(f"ref/region/list/subnational2/{parent_region}", endpoint="subnational2")
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+_client: EBirdClient | None = None
+
+
+def get_client() -> EBirdClient:
+    """Return the process-wide client so every caller shares one session and budget."""
+    global _client
+    if _client is None:
+        _client = EBirdClient()
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,80 @@
+# ingest.py
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+from metrics import metrics
+from models import Observation
+from time_utils import get_timezone_name, get_zone, parse_ebird_datetime
+
+_intern = sys.intern
+
+
+def _text(value, default: str | None = None) -> str | None:
+    """Interned copy of a repeated eBird string field (species, observer, location...)."""
+    return _intern(value) if isinstance(value, str) else default
+
+
+def iter_observations(rows: Iterable[dict], region_code: str) -> Iterator[Observation]:
+    """
+    Turn raw eBird observation dicts (recent/notable, detail=full) into
+    Observations in one pass.
+
+    Each distinct coordinate is resolved to a zone once and each distinct
+    (obsDt, zone) pair is converted to UTC once per call. Strings that repeat
+    across rows are interned so a large batch shares them. Rows without
+    coordinates or with an unparseable or date-only obsDt are skipped.
+    """
+    region_code = _intern(region_code)
+    zones: dict[tuple, tuple] = {}  # (lat, lon) -> (tz name, ZoneInfo)
+    times: dict[tuple, datetime] = {}  # (obsDt, tz name) -> UTC datetime
+    tz_seconds = 0.0
+
+    try:
+        for d in rows:
+            lat = d.get("lat")
+            lon = d.get("lng")
+            if lat is None or lon is None:
+                continue
+
+            start = time.perf_counter()
+            zone = zones.get((lat, lon))
+            if zone is None:
+                try:
+                    tz_name = _intern(get_timezone_name(lat, lon))
+                except Exception:
+                    tz_name = "UTC"
+                zone = zones[(lat, lon)] = (tz_name, get_zone(tz_name))
+            tz_name, tzinfo = zone
+
+            obs_dt = d.get("obsDt")
+            obs_utc = times.get((obs_dt, tz_name))
+            if obs_utc is None:
+                try:
+                    naive_local = obs_dt if isinstance(obs_dt, datetime) else parse_ebird_datetime(obs_dt)
+                except (TypeError, ValueError):
+                    tz_seconds += time.perf_counter() - start
+                    continue  # Skip malformed dates
+                obs_utc = times[(obs_dt, tz_name)] = naive_local.replace(tzinfo=tzinfo).astimezone(timezone.utc)
+            tz_seconds += time.perf_counter() - start
+
+            yield Observation(
+                checklist_id=_text(d.get("subId")),
+                species=_text(d.get("comName")),
+                region=region_code,
+                location=_text(d.get("locName"), "Unknown"),
+                observer=_text(d.get("userDisplayName"), "Unknown"),
+                obs_datetime=obs_utc,
+                local_tz=tz_name,
+                thread_tracker_key=None,
+                lat=lat,
+                lon=lon,
+                has_media=bool(d.get("hasRichMedia", [])),
+                loc_id=_text(d.get("locId")),
+            )
+    finally:
+        metrics.observe("rba_stage_seconds", tz_seconds, stage="timezone")
+
+
+def build_observations(rows: Iterable[dict], region_code: str) -> list[Observation]:
+    return list(iter_observations(rows, region_code))
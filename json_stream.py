@@ -0,0 +1,106 @@
+# json_stream.py
+import codecs
+import json
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+_WS_OR_COMMA = re.compile(r"[\s,]*")
+_WS = re.compile(r"\s*")
+_DELIMITERS = frozenset(",] \t\r\n")
+
+
+class JsonArrayParser:
+    """
+    Incremental parser for a top-level JSON array.
+
+    Feed it the document in text chunks of any size and it returns each
+    element as soon as that element is complete, so only the unparsed tail of
+    the document (usually less than one element) is held in memory.
+
+        parser = JsonArrayParser()
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...
+        parser.close()
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.done = False
+
+    def feed(self, text: str, final: bool = False) -> list:
+        buffer = self._buffer + text
+        pos = _WS.match(buffer).end()
+        items = []
+
+        if not self._started:
+            if pos == len(buffer):
+                self._buffer = ""
+                return items
+            if buffer[pos] != "[":
+                raise ValueError(f"Expected a JSON array, found {buffer[pos:pos + 20]!r}")
+            self._started = True
+            pos += 1
+
+        while not self.done:
+            pos = _WS_OR_COMMA.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # element continues in the next chunk
+            if end == len(buffer) or buffer[end] not in _DELIMITERS:
+                # A number cut off mid-chunk ("2." of "2.5") also decodes, so only
+                # accept an element once the character after it is seen
+                if not final:
+                    break
+                if end < len(buffer):
+                    raise ValueError(f"Unexpected {buffer[end:end + 20]!r} after array element")
+            items.append(item)
+            pos = end
+
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self) -> list:
+        """Parse whatever is left; raises if the array was never closed."""
+        items = self.feed("", final=True) if self._buffer else []
+        if not self.done:
+            raise ValueError("JSON array ended before its closing ']'")
+        return items
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator:
+    """Yield the elements of a JSON array arriving as text chunks."""
+    parser = JsonArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def iter_json_array_file(path: str, chunk_size: int = 1 << 16) -> Iterator:
+    """Yield the elements of the JSON array stored in `path` without loading the whole file."""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_json_array(iter(lambda: f.read(chunk_size), ""))
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator:
+    """Async version of iter_json_array for byte chunks, e.g. an aiohttp response body."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parser = JsonArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(decoder.decode(chunk)):
+            yield item
+    for item in parser.feed(decoder.decode(b"", final=True)):
+        yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,214 @@
+# metrics.py
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 keeps the HTTP endpoint off
+METRICS_LOG_MINUTES = float(os.getenv("METRICS_LOG_MINUTES", "60"))
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))  # recent samples kept per histogram
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Count and sum of every observation, plus a window of recent ones for quantiles."""
+
+    def __init__(self, window: int | None = METRICS_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self, qs=QUANTILES) -> dict[float, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in qs}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in qs}
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms.
+
+        metrics.inc("ebird_requests_total", endpoint="notable", status="200")
+        with metrics.timed("rba_stage_seconds", stage="cluster"):
+            ...
+
+    Modules that already keep their own counters (caches, the DB writer, the
+    send queue) register a callback instead of double counting. Safe to use
+    from worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+        self.callbacks: dict[str, tuple[str, object]] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timed(self, name: str, **labels):
+        """Observe the wall time of the block (also across awaits) under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def register(self, name: str, fn, kind: str = "gauge"):
+        """Report fn() as `name` at scrape time; kind is "gauge" or "counter"."""
+        self.callbacks[name] = (kind, fn)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --------------------
+    # Output
+    # --------------------
+    def render_text(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((k, h.count, h.total, h.quantiles()) for k, h in self.histograms.items())
+
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), count, total, quantiles in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {name} summary")
+                declared.add(name)
+            for q, value in quantiles.items():
+                lines.append(f"{name}{_format_labels(labels, (('quantile', q),))} {value:.6f}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for name, (kind, fn) in sorted(self.callbacks.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Metric callback {name} failed: {e}")
+                continue
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self, collapse: tuple[str, ...] = ("region",)) -> list[str]:
+        """
+        Human-readable p50/p95/p99 per histogram, then counters, for logs and
+        !stats. Histograms differing only in a `collapse` label are merged so
+        per-region series read as one line.
+        """
+        lines = [f"uptime {_duration_text(time.time() - self.started)}"]
+        merged: dict[tuple, Histogram] = {}
+        with self._lock:
+            for (name, labels), hist in self.histograms.items():
+                key = (name, tuple((k, v) for k, v in labels if k not in collapse))
+                target = merged.setdefault(key, Histogram(window=None))
+                target.count += hist.count
+                target.total += hist.total
+                target.samples.extend(hist.samples)
+            counters = sorted(self.counters.items())
+        for (name, labels), hist in sorted(merged.items()):
+            q = hist.quantiles()
+            label = ",".join(str(v) for _, v in labels)
+            lines.append(f"{name.removesuffix('_seconds')}[{label}] n={hist.count} "
+                         f"p50={q[0.5] * 1000:.0f}ms p95={q[0.95] * 1000:.0f}ms p99={q[0.99] * 1000:.0f}ms")
+        for (name, labels), value in counters:
+            label = ",".join(str(v) for _, v in labels)
+            lines.append(f"{name}[{label}] {value:g}" if label else f"{name} {value:g}")
+        for name, (_, fn) in sorted(self.callbacks.items()):
+            try:
+                lines.append(f"{name} {fn():g}")
+            except Exception:
+                continue
+        return lines
+
+
+def _duration_text(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}m"
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def peak_rss_text() -> str:
+    peak = peak_rss_bytes()
+    return f"{peak / 2**20:.0f} MiB" if peak is not None else "n/a"
+
+
+metrics = Metrics()
+if resource is not None:
+    metrics.register("process_peak_rss_bytes", peak_rss_bytes)
+
+
+# --------------------
+# HTTP endpoint
+# --------------------
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serve GET /metrics on host:port; returns the runner (None when port is 0)."""
+    if not port:
+        return None
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=metrics.render_text(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return runner
@@ -12,7 +12,7 @@ class ModerationStatus(str, Enum):
     ACCEPTED = "accepted"
     REJECTED = "rejected"
 
-@dataclass
+@dataclass(slots=True)
 class ThreadRecord:
     tracker_key: str
     thread_id: int
@@ -22,7 +22,7 @@ class ThreadRecord:
     active_checklists: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Observation:
     checklist_id: str
     species: str
@@ -36,6 +36,7 @@ class Observation:
     lon: float | None = None
     counted: bool = False
     has_media: bool = False
+    loc_id: str | None = None
 
 
 @dataclass
@@ -59,3 +60,13 @@ class MissedObservation:
     missed_at: datetime
     thread_tracker_key: str | None
     related_checklist: str | None = None
+
+
+@dataclass
+class PostedCluster:
+    region: str
+    cluster_id: str  # normalized species + location of the cluster
+    fingerprint: str  # checklist ids in the cluster when last posted
+    channel_id: int
+    message_id: int
+    posted_at: datetime
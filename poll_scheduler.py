@@ -0,0 +1,243 @@
+# poll_scheduler.py
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from ebird_api import fetch_ebird_rba, fetch_statewide_rba
+from ebird_client import EBirdError, get_client, request_source
+from metrics import metrics
+from rba_delta import RBA_DELTA_POSTING
+from region_registry import get_registry
+from tasks import RBA_STATEWIDE_INGEST, post_region
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+# Poll counties through the day instead of only fetching at the 7am/5pm digests
+RBA_ADAPTIVE_POLLING = os.getenv("RBA_ADAPTIVE_POLLING", "1").lower() not in ("0", "false", "no")
+# eBird HTTP requests per rolling 24 hours for the whole bot (retries, digests and !rba included);
+# polling gets whatever the rest of the bot has not used
+RBA_DAILY_REQUEST_BUDGET = int(os.getenv("RBA_DAILY_REQUEST_BUDGET", "1500"))
+RBA_POLL_MIN_MINUTES = float(os.getenv("RBA_POLL_MIN_MINUTES", "15"))
+RBA_POLL_MAX_MINUTES = float(os.getenv("RBA_POLL_MAX_MINUTES", "720"))
+# How old a county's polled data may be for the 7am/5pm digest to post it instead of fetching again
+RBA_DIGEST_REUSE_MINUTES = float(os.getenv("RBA_DIGEST_REUSE_MINUTES", "60"))
+
+DAY = 24 * 3600
+ACTIVITY_SMOOTHING = 0.5  # weight of the newest poll in a county's activity score
+POLL_SOURCE = "poll"  # request_source of eBird requests made by polls
+
+
+def county_activity(rows: list[dict]) -> int:
+    """Distinct notable species/location pairs in a county's notable list."""
+    return len({(row.get("speciesCode") or row.get("comName"), row.get("locId")) for row in rows})
+
+
+def plan_intervals(activity: dict[str, float], budget: int, min_interval: float,
+                   max_interval: float) -> dict[str, float]:
+    """
+    Split `budget` polls per day between counties in proportion to
+    1 + sqrt(activity), keeping each interval within [min_interval,
+    max_interval]. If the budget cannot even cover max_interval for every
+    county, it is shared evenly and the intervals run longer.
+    """
+    if not activity:
+        return {}
+    weights = {code: 1 + math.sqrt(max(0.0, a)) for code, a in activity.items()}
+    floor, ceiling = DAY / max_interval, DAY / min_interval  # polls per day
+    if budget <= floor * len(weights):
+        return {code: DAY * len(weights) / max(budget, 1) for code in weights}
+
+    polls: dict[str, float] = {}
+    free = dict(weights)
+    remaining = float(budget)
+    while free:
+        share = remaining / sum(free.values())
+        clamped = {code: min(ceiling, max(floor, w * share)) for code, w in free.items()}
+        pinned = {code: p for code, p in clamped.items() if p != free[code] * share}
+        if not pinned:
+            polls.update(clamped)
+            break
+        polls.update(pinned)
+        remaining = max(0.0, remaining - sum(pinned.values()))
+        for code in pinned:
+            del free[code]
+    return {code: DAY / p for code, p in polls.items()}
+
+
+class PollScheduler:
+    """
+    Refreshes each county on its own staggered timer instead of fetching all
+    of them at once.
+
+    Busy counties (more distinct notable sightings on their last poll) are
+    polled more often and quiet ones less. The budget is counted in real eBird
+    HTTP requests (the client's request log, retries included): polls are
+    planned with what digests, commands and other traffic left of
+    RBA_DAILY_REQUEST_BUDGET, and stop while the whole bot is at the budget.
+    In statewide mode one US-CO response serves every county that comes due
+    within min_interval of it, so polling costs about one request per
+    min_interval however many counties there are.
+
+    Each poll warms the notable cache for !rba and, in delta mode, posts new
+    or changed clusters straight away. The latest rows per county are kept
+    so the twice-daily digest can reuse the fresh ones.
+    """
+
+    def __init__(self, channels, budget: int = RBA_DAILY_REQUEST_BUDGET,
+                 min_interval: float = RBA_POLL_MIN_MINUTES * 60, max_interval: float = RBA_POLL_MAX_MINUTES * 60,
+                 delta: bool = RBA_DELTA_POSTING, statewide: bool = RBA_STATEWIDE_INGEST):
+        self.channels = channels  # ChannelRegistry-like: for_region(code) -> channel or None
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.delta = delta
+        self.statewide = statewide
+        self.activity: dict[str, float] = {}
+        self.intervals: dict[str, float] = {}
+        self.latest: dict[str, tuple[float, list[dict]]] = {}  # code -> (fetched at, rows)
+        self._heap: list[tuple[float, str]] = []  # (due, region code), monotonic clock
+        self._due: dict[str, float] = {}  # current due time per county; older heap entries are stale
+        self._statewide: tuple[float, float, dict] | None = None  # (monotonic, wall time, buckets) of the last statewide poll
+        self._paused_until = 0.0  # end of the current budget pause, so it is logged once
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return len(self._due)
+
+    # --------------------
+    # Budget
+    # --------------------
+    def requests_today(self) -> int:
+        """eBird HTTP requests in the last 24h from every part of the bot."""
+        return get_client().requests.count()
+
+    def poll_requests_today(self) -> int:
+        return get_client().requests.count(POLL_SOURCE)
+
+    def poll_allowance(self) -> int:
+        """Requests per day left for polls once everything else in the last 24h is accounted for."""
+        return max(0, self.budget - (self.requests_today() - self.poll_requests_today()))
+
+    def replan(self):
+        self.intervals = plan_intervals(self.activity, self.poll_allowance(), self.min_interval, self.max_interval)
+
+    def _schedule(self, code: str, when: float):
+        self._due[code] = when
+        heapq.heappush(self._heap, (when, code))
+
+    def sync_counties(self, now: float | None = None):
+        """Track newly known counties, staggered evenly over one average interval."""
+        now = time.monotonic() if now is None else now
+        codes = [r["code"] for r in get_registry().counties()]
+        new = [code for code in codes if code not in self.activity]
+        for code in new:
+            self.activity[code] = 0.0
+        for code in set(self.activity) - set(codes):
+            del self.activity[code]
+            self._due.pop(code, None)
+            self.latest.pop(code, None)
+        if not new:
+            return
+        self.replan()
+        spread = min(self.max_interval, DAY * len(self.activity) / max(self.poll_allowance(), 1))
+        for i, code in enumerate(new):
+            self._schedule(code, now + spread * (i + 0.5) / len(new))
+
+    async def _fetch(self, code: str) -> tuple[float, list[dict]]:
+        """(time fetched, rows) for one county, from a recent statewide response when possible."""
+        if self.statewide:
+            now = time.monotonic()
+            if self._statewide is None or now - self._statewide[0] > self.min_interval:
+                try:
+                    # Counties the statewide response cannot fully cover are left out of `buckets`
+                    buckets, _ = await fetch_statewide_rba(list(self.activity))
+                except EBirdError as e:
+                    logger.warning(f"Statewide poll failed, polling counties one by one: {e}")
+                    buckets = {}
+                self._statewide = (now, time.time(), buckets)
+            _, fetched_at, buckets = self._statewide
+            if code in buckets:
+                return fetched_at, buckets[code]
+        return time.time(), await fetch_ebird_rba(code, refresh=True)
+
+    async def poll(self, code: str):
+        """Fetch one county, post its delta and reschedule it."""
+        token = request_source.set(POLL_SOURCE)
+        try:
+            with metrics.timed("rba_poll_seconds"):
+                result = await self._fetch(code)
+        except Exception as e:
+            result = e
+        finally:
+            request_source.reset(token)
+
+        if isinstance(result, Exception):
+            metrics.inc("rba_polls_total", status="error")
+            logger.warning(f"Poll of {code} failed: {result}")
+        else:
+            metrics.inc("rba_polls_total", status="ok")
+            fetched_at, rows = result
+            self.latest[code] = (fetched_at, rows)
+            self.activity[code] = ((1 - ACTIVITY_SMOOTHING) * self.activity.get(code, 0.0)
+                                   + ACTIVITY_SMOOTHING * county_activity(rows))
+            self.replan()
+            channel = self.channels.for_region(code)
+            if channel is not None and self.delta:
+                await post_region(channel, code, rows, delta=True)
+
+        self._schedule(code, time.monotonic() + self.intervals.get(code, self.max_interval))
+
+    def snapshot(self, max_age: float = RBA_DIGEST_REUSE_MINUTES * 60) -> dict[str, list[dict]]:
+        """
+        Rows from each county's latest poll that are still fresh: fetched within
+        `max_age` seconds and within that county's own poll interval.
+        """
+        now = time.time()
+        return {code: rows for code, (fetched_at, rows) in self.latest.items()
+                if now - fetched_at <= min(max_age, self.intervals.get(code, self.max_interval))}
+
+    async def _run(self):
+        while True:
+            self.sync_counties()
+            if not self._heap:
+                await asyncio.sleep(60)
+                continue
+
+            due, code = self._heap[0]
+            now = time.monotonic()
+            if due > now:
+                # Wake at least once a minute to notice counties added to the registry
+                await asyncio.sleep(min(due - now, 60))
+                continue
+            heapq.heappop(self._heap)
+            if self._due.get(code) != due:
+                continue
+
+            if self.requests_today() >= self.budget:
+                resume = now + max(60.0, get_client().requests.frees_in())
+                if now >= self._paused_until:
+                    logger.warning(f"Daily eBird request budget of {self.budget} used, "
+                                   f"pausing polls for {(resume - now) / 60:.0f} min")
+                self._paused_until = resume
+                self._schedule(code, resume)
+                continue
+
+            del self._due[code]
+            try:
+                await self.poll(code)
+            except Exception as e:
+                logger.error(f"Poll of {code} failed: {e}")
+                self._schedule(code, time.monotonic() + self.max_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            metrics.register("ebird_requests_24h", self.requests_today)
+            metrics.register("rba_poll_requests_24h", self.poll_requests_today)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,85 @@
+# rate_limit.py
+import asyncio
+import time
+from collections import Counter, deque
+
+
+class TokenBucket:
+    """
+    Async token bucket. Tokens refill continuously at `rate` per second up to
+    `capacity`; `acquire()` waits until enough tokens are available. Waiters are
+    served in arrival order, so one shared bucket gives every caller a fair
+    slice of the same budget.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Take `tokens` from the bucket, waiting if needed. Returns seconds waited."""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket capacity")
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return time.monotonic() - start
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class RequestLog:
+    """
+    Rolling count of requests per source over the last `window` seconds, kept
+    in `resolution`-second buckets so memory stays bounded however busy it is.
+    """
+
+    def __init__(self, window: float = 24 * 3600, resolution: float = 60):
+        self.window = window
+        self.resolution = resolution
+        self._buckets: deque[tuple[int, Counter]] = deque()  # (bucket number, count per source)
+
+    def _expire(self, now: float):
+        # A bucket is dropped only once all of it is older than the window
+        while self._buckets and (self._buckets[0][0] + 1) * self.resolution <= now - self.window:
+            self._buckets.popleft()
+
+    def add(self, source: str = "other", now: float | None = None):
+        now = time.monotonic() if now is None else now
+        slot = int(now // self.resolution)
+        if not self._buckets or self._buckets[-1][0] != slot:
+            self._buckets.append((slot, Counter()))
+        self._buckets[-1][1][source] += 1
+        self._expire(now)
+
+    def count(self, source: str | None = None, now: float | None = None) -> int:
+        """Requests in the window, from `source` only or from every source."""
+        self._expire(time.monotonic() if now is None else now)
+        if source is None:
+            return sum(n for _, counts in self._buckets for n in counts.values())
+        return sum(counts[source] for _, counts in self._buckets)
+
+    def frees_in(self, now: float | None = None) -> float:
+        """Seconds until the oldest counted requests leave the window (0 when empty)."""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if not self._buckets:
+            return 0.0
+        return max(0.0, (self._buckets[0][0] + 1) * self.resolution + self.window - now)
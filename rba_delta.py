@@ -0,0 +1,149 @@
+# rba_delta.py
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import discord
+from clustering import normalize_species_name
+from db import get_posted_clusters, save_posted_clusters, prune_posted_clusters
+from db_async import database
+from discord_messages import iter_rendered_clusters, pack_messages, MAX_DISCORD_MSG_LEN
+from models import PostedCluster
+from send_queue import outbound
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+# Post only new/changed clusters in scheduled runs instead of the full list
+RBA_DELTA_POSTING = os.getenv("RBA_DELTA_POSTING", "1").lower() not in ("0", "false", "no")
+# How long a posted cluster is remembered; longer than the 2-day notable window
+POSTED_RETENTION = timedelta(days=3)
+
+
+def cluster_id(key) -> str:
+    species, _, _, location = key
+    return f"{normalize_species_name(species)}|{location}"
+
+
+def cluster_ids(keys: list) -> list[str]:
+    """
+    Stable ids for a run's cluster keys. Clusters are too far apart to merge
+    when they share a species and location name (e.g. "Private"), so every
+    member of such a group is told apart by its rounded coordinates. That
+    way the id does not depend on which cluster was seen first.
+    """
+    base = [cluster_id(key) for key in keys]
+    counts = Counter(base)
+    return [cid if counts[cid] == 1 else f"{cid}|{_rounded(key[1])},{_rounded(key[2])}"
+            for cid, key in zip(base, keys)]
+
+
+def _rounded(coord: float | None) -> str:
+    return "?" if coord is None else f"{coord:.2f}"
+
+
+def cluster_fingerprint(recent_obs: list) -> str:
+    """The cluster's checklist ids, sorted and space separated (compared as a set by has_news)."""
+    return " ".join(sorted({o.checklist_id or "" for o in recent_obs}))
+
+
+def has_news(previous: str, current: str) -> bool:
+    """
+    True if `current` holds a checklist that `previous` did not. Checklists
+    that only aged out of the window shrink the set without being news, so
+    they do not trigger an edit.
+    """
+    return not set(current.split(" ")) <= set(previous.split(" "))
+
+
+@dataclass
+class RenderedCluster:
+    cluster_id: str
+    fingerprint: str
+    lines: list[str]
+
+
+@dataclass
+class DeltaPlan:
+    new: list[RenderedCluster] = field(default_factory=list)  # to post as new messages
+    edits: dict[int, list[RenderedCluster]] = field(default_factory=dict)  # message_id -> its full new content
+    unchanged: int = 0
+
+
+def plan_delta(observations: list, posted: dict[str, PostedCluster],
+               limit: int = MAX_DISCORD_MSG_LEN) -> DeltaPlan:
+    """
+    Compare the clusters in `observations` with what was last posted.
+
+    Unseen clusters are posted. A message holding a changed cluster is
+    re-rendered with all of its still-current clusters and edited in place;
+    if that no longer fits, the changed clusters are posted anew instead.
+    Messages whose clusters are all unchanged are left alone.
+    """
+    plan = DeltaPlan()
+    by_message: dict[int, list[RenderedCluster]] = defaultdict(list)
+    changed_messages: set[int] = set()
+
+    rendered = list(iter_rendered_clusters(observations, limit))
+    for cid, (key, recent_obs, lines) in zip(cluster_ids([key for key, _, _ in rendered]), rendered):
+        cluster = RenderedCluster(cid, cluster_fingerprint(recent_obs), lines)
+
+        previous = posted.get(cid)
+        if previous is None:
+            plan.new.append(cluster)
+            continue
+        by_message[previous.message_id].append(cluster)
+        if has_news(previous.fingerprint, cluster.fingerprint):
+            changed_messages.add(previous.message_id)
+
+    for message_id, clusters in by_message.items():
+        if message_id not in changed_messages:
+            plan.unchanged += len(clusters)
+        elif sum(len(line) + 1 for c in clusters for line in c.lines) <= limit:
+            plan.edits[message_id] = clusters
+        else:
+            news = [c for c in clusters if has_news(posted[c.cluster_id].fingerprint, c.fingerprint)]
+            plan.new.extend(news)
+            plan.unchanged += len(clusters) - len(news)
+    return plan
+
+
+async def post_rba_delta(channel, region_code: str, observations: list,
+                         limit: int = MAX_DISCORD_MSG_LEN) -> DeltaPlan:
+    """Publish only new or changed clusters for a region and remember what was posted."""
+    posted = await database.read(get_posted_clusters, region_code)
+    plan = plan_delta(observations, posted, limit)
+    now = datetime.now(timezone.utc)
+    records: list[PostedCluster] = []
+
+    for message_id, clusters in plan.edits.items():
+        text = "\n".join(line for c in clusters for line in c.lines)
+        try:
+            await outbound.edit(channel.get_partial_message(message_id), content=text)
+        except discord.HTTPException as e:
+            # Deleted or not ours to edit any more: post the changed clusters instead
+            logger.warning(f"Could not edit RBA message {message_id} in {channel}: {e}")
+            plan.new.extend(c for c in clusters if has_news(posted[c.cluster_id].fingerprint, c.fingerprint))
+            continue
+        records.extend(PostedCluster(region_code, c.cluster_id, c.fingerprint, channel.id, message_id, now)
+                       for c in clusters)
+
+    # Queue every new message up front so the channel's lane can pace them back to back
+    sends = [(clusters, outbound.submit(channel, text, silent=True))
+             for text, clusters in pack_messages(((c, c.lines) for c in plan.new), limit)]
+    results = await asyncio.gather(*(pending for _, pending in sends), return_exceptions=True)
+    for (clusters, _), message in zip(sends, results):
+        if isinstance(message, Exception):
+            logger.warning(f"Could not post RBA message in {channel}: {message}")
+            continue
+        records.extend(PostedCluster(region_code, c.cluster_id, c.fingerprint, channel.id, message.id, now)
+                       for c in clusters)
+
+    await database.write(save_posted_clusters, records)
+    return plan
+
+
+async def prune_posted(now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    return await database.write(prune_posted_clusters, now - POSTED_RETENTION)
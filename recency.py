@@ -0,0 +1,212 @@
+# recency.py
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from db import get_latest_sightings, get_thread, update_thread_buckets
+from db_async import database
+from models import ThreadRecord
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+NO_REPORTS = "No reports"
+STALE_BUCKET = ">7d"
+
+# (age limit, bucket) in ascending order; anything older is STALE_BUCKET
+RECENCY_BUCKETS = [
+    (timedelta(days=1), "<24h"),
+    (timedelta(days=3), "1-3d"),
+    (timedelta(days=7), "3-7d"),
+]
+
+
+def classify_recency(latest_dt: datetime | None, now: datetime | None = None) -> str:
+    """Bucket the age of the latest sighting."""
+    if latest_dt is None:
+        return NO_REPORTS
+    delta = (now or datetime.now(timezone.utc)) - latest_dt
+    for limit, bucket in RECENCY_BUCKETS:
+        if delta < limit:
+            return bucket
+    return STALE_BUCKET
+
+
+def badge_name(name: str, bucket: str, max_len: int = 100) -> str:
+    """Thread name with its recency badge, e.g. "[1-3d] Snowy Owl"; replaces an existing badge."""
+    if name.startswith("[") and "] " in name:
+        name = name.split("] ", 1)[1]
+    return f"[{bucket}] {name}"[:max_len]
+
+
+def recompute_buckets(region_code: str | None = None, now: datetime | None = None) -> list[ThreadRecord]:
+    """
+    Reclassify every thread of a region (or all threads) from one aggregate
+    query and persist only the buckets that changed, in a single transaction.
+    Returns the changed threads with their new status_bucket set.
+    """
+    now = now or datetime.now(timezone.utc)
+    changed = []
+    for thread, latest_dt in get_latest_sightings(region_code):
+        bucket = classify_recency(latest_dt, now)
+        if bucket != thread.status_bucket:
+            thread.status_bucket = bucket
+            changed.append(thread)
+
+    update_thread_buckets([(t.tracker_key, t.status_bucket) for t in changed])
+    return changed
+
+
+def next_transition(latest_dt: datetime | None, now: datetime) -> datetime | None:
+    """When the bucket for `latest_dt` next changes after `now`, or None once it is stale."""
+    if latest_dt is None:
+        return None
+    for limit, _ in RECENCY_BUCKETS:
+        if latest_dt + limit > now:
+            return latest_dt + limit
+    return None
+
+
+class RecencyScheduler:
+    """
+    Keeps a min-heap of the next bucket transition of every thread and wakes
+    only when one is due, so badges flip within a second of the boundary
+    without rescanning threads.
+
+    rebuild() loads the heap from the database; note_observations() is
+    registered as a db checklist listener and schedules an immediate
+    reclassification when a newer sighting is saved. `on_change` is awaited
+    with the list of threads whose bucket changed.
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self._heap: list[tuple[datetime, str]] = []  # (transition time, tracker_key)
+        self._due: dict[str, datetime] = {}  # current transition per key; older heap entries are stale
+        self._latest: dict[str, datetime | None] = {}
+        self._threads: dict[str, ThreadRecord] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return len(self._due)
+
+    async def rebuild(self, now: datetime | None = None) -> list[ThreadRecord]:
+        """Reload every thread from the DB, fixing any bucket that drifted while offline."""
+        now = now or datetime.now(timezone.utc)
+        changed = await database.write(recompute_buckets, None, now)
+        sightings = await database.read(get_latest_sightings, None)
+        self._heap.clear()
+        self._due.clear()
+        self._latest.clear()
+        self._threads.clear()
+        for thread, latest_dt in sightings:
+            self._threads[thread.tracker_key] = thread
+            self._latest[thread.tracker_key] = latest_dt
+            when = next_transition(latest_dt, now)
+            if when is not None:
+                self._due[thread.tracker_key] = when
+                self._heap.append((when, thread.tracker_key))
+        heapq.heapify(self._heap)
+        return changed
+
+    def _schedule(self, tracker_key: str, when: datetime):
+        self._due[tracker_key] = when
+        heapq.heappush(self._heap, (when, tracker_key))
+
+    def note_observations(self, observations):
+        """Checklist listener; safe to call from any thread."""
+        sightings = [(o.thread_tracker_key, o.obs_datetime) for o in observations if o.thread_tracker_key]
+        if not sightings:
+            return
+        if self._loop is not None and self._loop.is_running() and not _in_loop(self._loop):
+            self._loop.call_soon_threadsafe(self._note_sightings, sightings)
+        else:
+            self._note_sightings(sightings)
+
+    def _note_sightings(self, sightings):
+        for tracker_key, obs_dt in sightings:
+            latest = self._latest.get(tracker_key)
+            if latest is None or obs_dt > latest:
+                self._latest[tracker_key] = obs_dt
+                # Due now: a newer sighting can move the thread back to a fresher bucket
+                self._schedule(tracker_key, datetime.now(timezone.utc))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_due(self, now: datetime) -> set[str]:
+        due = set()
+        while self._heap and self._heap[0][0] <= now:
+            when, tracker_key = heapq.heappop(self._heap)
+            if self._due.get(tracker_key) == when:
+                del self._due[tracker_key]
+                due.add(tracker_key)
+        return due
+
+    def _reclassify(self, due: set[str], now: datetime) -> list[ThreadRecord]:
+        changed = []
+        for tracker_key in due:
+            thread = self._threads.get(tracker_key)
+            if thread is None:
+                continue
+            latest_dt = self._latest.get(tracker_key)
+            bucket = classify_recency(latest_dt, now)
+            if bucket != thread.status_bucket:
+                thread.status_bucket = bucket
+                changed.append(thread)
+            when = next_transition(latest_dt, now)
+            if when is not None:
+                self._schedule(tracker_key, when)
+        return changed
+
+    async def process_due(self, now: datetime | None = None) -> list[ThreadRecord]:
+        """Reclassify threads whose transition time has passed and persist changes."""
+        now = now or datetime.now(timezone.utc)
+        due = self._pop_due(now)
+        for tracker_key in due - self._threads.keys():
+            thread = await database.read(get_thread, tracker_key)
+            if thread is not None:
+                self._threads[tracker_key] = thread
+        changed = self._reclassify(due, now)
+        if changed:
+            await database.write(update_thread_buckets, [(t.tracker_key, t.status_bucket) for t in changed])
+        return changed
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            changed = await self.process_due()
+            if changed and self.on_change:
+                try:
+                    await self.on_change(changed)
+                except Exception as e:
+                    logger.error(f"Recency update callback failed: {e}")
+
+    async def start(self) -> list[ThreadRecord]:
+        """Rebuild from the DB and start waking on transitions. Returns threads fixed by the rebuild."""
+        changed = await self.rebuild()
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        return changed
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
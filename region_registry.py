@@ -0,0 +1,156 @@
+# region_registry.py
+import difflib
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from db import get_connection, transaction
+from db_async import database
+from ebird_client import get_client
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+STATE_CODE = "US-CO"
+
+
+@dataclass(frozen=True)
+class Region:
+    code: str
+    name: str
+    type: str | None = None
+
+    def as_dict(self) -> dict:
+        return {"code": self.code, "name": self.name}
+
+
+def _load_regions() -> tuple[list[Region], datetime | None]:
+    """All regions, and when the table was last refreshed from eBird (None if never)."""
+    conn = get_connection()
+    rows = conn.execute("SELECT code, name, type FROM regions").fetchall()
+    refreshed_at = conn.execute("SELECT MAX(updated_at) FROM regions").fetchone()[0]
+    return ([Region(row["code"], row["name"], row["type"]) for row in rows],
+            datetime.fromisoformat(refreshed_at) if refreshed_at else None)
+
+
+def _upsert_regions(regions: list[dict], refreshed_at: datetime):
+    conn = get_connection()
+    with transaction(conn):
+        conn.executemany("""
+            INSERT INTO regions (code, name, type, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(code) DO UPDATE SET name=excluded.name, type=excluded.type, updated_at=excluded.updated_at
+        """, [(r["code"], r["name"], r.get("type"), refreshed_at.isoformat()) for r in regions])
+
+
+def _tokens(name: str) -> list[str]:
+    return name.lower().replace("-", " ").split()
+
+
+class RegionRegistry:
+    """
+    In-memory index of eBird regions, loaded once from the regions table.
+
+    Lookups are O(1) by code, full name or single name token ("paso"), with
+    ranked fuzzy suggestions for misspellings. The network refresh is an
+    explicit step (refresh()) that rewrites the table and reloads the index;
+    its time is stored with the rows, so refreshed_at survives restarts.
+    """
+
+    def __init__(self, regions=(), refreshed_at: datetime | None = None):
+        self.refreshed_at = refreshed_at
+        self._set(regions)
+
+    def _set(self, regions):
+        self.regions: tuple[Region, ...] = tuple(sorted(regions, key=lambda r: r.code))
+        self.by_code = {r.code.upper(): r for r in self.regions}
+        self.by_name = {}
+        tokens = defaultdict(list)
+        for r in self.regions:
+            self.by_name.setdefault(r.name.lower(), r)
+            for token in _tokens(r.name):
+                tokens[token].append(r)
+        self.by_token = {k: tuple(v) for k, v in tokens.items()}
+
+    def __len__(self):
+        return len(self.regions)
+
+    def load(self):
+        """(Re)load the index and refresh time from the regions table."""
+        regions, self.refreshed_at = _load_regions()
+        self._set(regions)
+        return self
+
+    async def refresh(self, parent_region: str = STATE_CODE) -> int:
+        """Fetch subnational2 regions from eBird, upsert them and reload the index."""
+        regions = await get_client().subnational2_regions(parent_region)
+        await database.write(_upsert_regions, regions, datetime.now(timezone.utc))
+        loaded, self.refreshed_at = await database.read(_load_regions)
+        self._set(loaded)
+        logger.info(f"Ingested {len(regions)} regions.")
+        return len(regions)
+
+    # --------------------
+    # Lookups
+    # --------------------
+    def get(self, code: str) -> Region | None:
+        return self.by_code.get(code.strip().upper())
+
+    def lookup(self, query: str) -> Region | None:
+        """Resolve a region code, county name or unique-enough name token."""
+        query = query.strip()
+        if not query:
+            return None
+        region = self.by_code.get(query.upper())
+        if region:
+            return region
+
+        name = query.lower()
+        if name.endswith(" county"):
+            name = name[: -len(" county")].strip()
+        region = self.by_name.get(name)
+        if region:
+            return region
+
+        matches = self.by_token.get(name)
+        if matches:
+            return matches[0]
+        return None
+
+    def suggest(self, query: str, limit: int = 3) -> list[Region]:
+        """Closest region names to a misspelled query, best first."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        candidates = list(self.by_name) + list(self.by_token)
+        suggestions = []
+        for match in difflib.get_close_matches(query, candidates, n=limit * 2, cutoff=0.6):
+            for region in (self.by_name[match],) if match in self.by_name else self.by_token[match]:
+                if region not in suggestions:
+                    suggestions.append(region)
+        return suggestions[:limit]
+
+    def counties(self, state_code: str = STATE_CODE) -> list[dict]:
+        """[{"code": "US-CO-013", "name": "Boulder"}, ...] sorted by name."""
+        prefix = f"{state_code}-"
+        return [r.as_dict() for r in sorted(self.regions, key=lambda r: r.name) if r.code.startswith(prefix)]
+
+
+_registry: RegionRegistry | None = None
+
+
+def get_registry() -> RegionRegistry:
+    """
+    Process-wide registry. The bot loads it with load_registry() at startup;
+    anything else gets it loaded from the DB on first use.
+    """
+    global _registry
+    if _registry is None:
+        _registry = RegionRegistry().load()
+    return _registry
+
+
+async def load_registry() -> RegionRegistry:
+    """(Re)load the process-wide registry through the async DB facade, off the event loop."""
+    global _registry
+    _registry = RegionRegistry(*await database.read(_load_regions))
+    return _registry
@@ -0,0 +1,250 @@
+# send_queue.py
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from metrics import metrics
+from rate_limit import TokenBucket
+
+logger = logging.getLogger("Dipper_RBA_Bot")
+
+# Priorities: lower is served first
+INTERACTIVE = 0  # command replies
+BULK = 1  # scheduled posts and thread updates
+
+DISCORD_MSG_LIMIT = 2000
+DISCORD_GLOBAL_RATE = float(os.getenv("DISCORD_GLOBAL_RATE", "40"))  # sends/sec across all channels
+DISCORD_CHANNEL_RATE = float(os.getenv("DISCORD_CHANNEL_RATE", "1"))  # sends/sec per channel
+DISCORD_CHANNEL_BURST = float(os.getenv("DISCORD_CHANNEL_BURST", "5"))
+
+
+class PriorityPacer:
+    """Token bucket shared by all channels; waiting interactive sends are granted before bulk ones."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters: list = []  # (priority, seq, future)
+        self._seq = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+    async def acquire(self, priority: int = BULK):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
+
+
+@dataclass
+class _Job:
+    priority: int
+    run: object  # zero-arg coroutine function performing the Discord call
+    futures: list
+    enqueued_at: float
+    content: str | None = None  # set only for plain, coalescible text sends
+    silent: bool = False
+
+
+@dataclass
+class _Lane:
+    """Pending work for one channel."""
+    bucket: TokenBucket
+    queues: tuple = field(default_factory=lambda: (deque(), deque()))  # by priority
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: asyncio.Task | None = None
+    current: _Job | None = None  # taken off the queue, not yet sent
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self.queues)
+
+    def pop(self) -> _Job | None:
+        for q in self.queues:
+            if q:
+                return q.popleft()
+        return None
+
+
+class OutboundQueue:
+    """
+    Central scheduler for outbound Discord messages.
+
+    Every channel gets its own FIFO lane and rate budget, all lanes share a
+    global pacing budget, interactive replies go ahead of bulk posts, and
+    consecutive short plain-text sends to one channel are merged into a
+    single message when they fit. Awaiting send() returns the Message that
+    carried the content.
+    """
+
+    def __init__(self, global_rate: float = DISCORD_GLOBAL_RATE, channel_rate: float = DISCORD_CHANNEL_RATE,
+                 channel_burst: float = DISCORD_CHANNEL_BURST, coalesce: bool = True):
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.coalesce = coalesce
+        self._pacer = PriorityPacer(global_rate, max(1.0, global_rate))
+        self._lanes: dict[int, _Lane] = {}
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # --------------------
+    # Public API
+    # --------------------
+    async def send(self, channel, content: str | None = None, *, priority: int = BULK, **kwargs):
+        """Queue channel.send(content, **kwargs) and return the resulting Message."""
+        return await self.submit(channel, content, priority=priority, **kwargs)
+
+    def submit(self, channel, content: str | None = None, *, priority: int = BULK, **kwargs) -> asyncio.Future:
+        """Queue a send without waiting for it; the returned future resolves to the Message."""
+        if content is not None and set(kwargs) <= {"silent"}:
+            job = _Job(priority, None, [], time.monotonic(), content=content, silent=kwargs.get("silent", False))
+            job.run = self._plain_sender(channel, job)
+        else:
+            job = _Job(priority, lambda: channel.send(content, **kwargs), [], time.monotonic())
+        return self._enqueue(channel, job)
+
+    async def send_all(self, channel, messages, *, priority: int = BULK, **kwargs) -> list:
+        """
+        Queue every message from an iterable (typically a streaming renderer)
+        as it is produced, so the first send can go out while later ones are
+        still being rendered. Returns the Messages once all have been sent.
+        """
+        futures = []
+        for content in messages:
+            futures.append(self.submit(channel, content, priority=priority, **kwargs))
+            await asyncio.sleep(0)  # let the lane worker pick it up
+        return await asyncio.gather(*futures)
+
+    async def edit(self, target, *, priority: int = BULK, **kwargs):
+        """Queue target.edit(**kwargs) on the lane of a message's channel, or of a channel/thread itself."""
+        job = _Job(priority, lambda: target.edit(**kwargs), [], time.monotonic())
+        return await self._enqueue(getattr(target, "channel", target), job)
+
+    def depth(self) -> int:
+        return sum(lane.depth() for lane in self._lanes.values())
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.depth(),
+            "busiest_channels": sorted(((lane.depth(), cid) for cid, lane in self._lanes.items() if lane.depth()),
+                                       reverse=True)[:5],
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "avg_wait_s": round(self.total_wait / self.sent, 3) if self.sent else 0.0,
+            "max_wait_s": round(self.max_wait, 3),
+        }
+
+    async def drain(self):
+        """Wait until every queued message has been handled."""
+        while self.depth() or any(lane.worker and lane.wakeup.is_set() for lane in self._lanes.values()):
+            await asyncio.sleep(0.05)
+
+    async def close(self):
+        """Stop every lane; callers still waiting on unsent messages get CancelledError."""
+        for lane in self._lanes.values():
+            if lane.worker:
+                lane.worker.cancel()
+            jobs = [lane.current] if lane.current else []
+            for q in lane.queues:
+                jobs.extend(q)
+                q.clear()
+            for job in jobs:
+                for future in job.futures:
+                    future.cancel()
+        self._lanes.clear()
+
+    # --------------------
+    # Internals
+    # --------------------
+    @staticmethod
+    def _plain_sender(channel, job: _Job):
+        # Read job.content at send time so coalesced text is included
+        return lambda: channel.send(job.content, silent=job.silent) if job.silent else channel.send(job.content)
+
+    def _enqueue(self, channel, job: _Job) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        job.futures.append(future)
+        lane = self._lanes.get(channel.id)
+        if lane is None:
+            lane = self._lanes[channel.id] = _Lane(TokenBucket(self.channel_rate, self.channel_burst))
+        lane.queues[min(job.priority, BULK)].append(job)
+        lane.wakeup.set()
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._run_lane(lane))
+        return future
+
+    def _merge_following(self, lane: _Lane, job: _Job):
+        """Fold queued plain sends of the same priority into `job` while they fit in one message."""
+        q = lane.queues[min(job.priority, BULK)]
+        while q and q[0].content is not None and q[0].silent == job.silent:
+            merged = f"{job.content}\n{q[0].content}"
+            if len(merged) > DISCORD_MSG_LIMIT:
+                break
+            nxt = q.popleft()
+            job.content = merged
+            job.futures.extend(nxt.futures)
+            job.enqueued_at = min(job.enqueued_at, nxt.enqueued_at)
+            self.coalesced += 1
+
+    async def _run_lane(self, lane: _Lane):
+        while True:
+            job = lane.pop()
+            if job is None:
+                lane.wakeup.clear()
+                await lane.wakeup.wait()
+                continue
+
+            if self.coalesce and job.content is not None:
+                self._merge_following(lane, job)
+
+            lane.current = job
+            await lane.bucket.acquire()
+            await self._pacer.acquire(job.priority)
+
+            waited = time.monotonic() - job.enqueued_at
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            metrics.observe("discord_queue_wait_seconds", waited)
+            try:
+                with metrics.timed("discord_send_seconds"):
+                    result = await job.run()
+            except Exception as e:
+                lane.current = None
+                self.failed += 1
+                for future in job.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            lane.current = None
+            self.sent += 1
+            for future in job.futures:
+                if not future.done():
+                    future.set_result(result)
+
+
+outbound = OutboundQueue()
+metrics.register("discord_queue_depth", outbound.depth)
+metrics.register("discord_sent_total", lambda: outbound.sent, kind="counter")
+metrics.register("discord_coalesced_total", lambda: outbound.coalesced, kind="counter")
@@ -1,80 +1,132 @@
 #tasks.py
-import discord
-from db import save_checklist, get_all_county_regions
-from ebird_api import fetch_ebird_rba
-from discord_messages import chunked_rba_messages
-from time_utils import ebird_local_to_utc, get_timezone_name
-from models import Observation
+import asyncio
+import os
+import time
+from db import save_checklists
+from db_async import database
+from ebird_api import fetch_ebird_rba, fetch_statewide_rba
+from ebird_client import EBirdError
+from discord_messages import iter_rba_messages
+from ingest import build_observations
+from metrics import metrics
+from rba_delta import RBA_DELTA_POSTING, post_rba_delta, prune_posted
+from send_queue import outbound
 
-async def build_region_channels_map(guild: discord.Guild):
+# Max number of county requests in flight at once during a scheduled run
+RBA_FETCH_CONCURRENCY = int(os.getenv("RBA_FETCH_CONCURRENCY", "8"))
+# Fetch the whole state once and split it by county instead of one call per county
+RBA_STATEWIDE_INGEST = os.getenv("RBA_STATEWIDE_INGEST", "1").lower() not in ("0", "false", "no")
+
+async def fetch_regions_concurrently(region_codes, concurrency: int = RBA_FETCH_CONCURRENCY):
     """
-    Build a dict mapping region_code -> Discord channel object.
-    Assumes your channels are named like "el-paso-rba" for "El Paso" county.
+    Fetch notable observations for every region at once, with at most
+    `concurrency` requests in flight, yielding (region_code, result) pairs in
+    completion order. `result` is the list of eBird dicts, or the exception
+    raised while fetching that region.
     """
-    regions = get_all_county_regions()  # [{"code": ..., "name": ...}]
-    region_channels = {}
-
-    for region in regions:
-        code = region["code"]
-        county_name = region["name"]
-        normalized_name = county_name.lower().replace(" ", "-")
-        expected_channel_name = f"{normalized_name}-rba"
+    semaphore = asyncio.Semaphore(max(1, concurrency))
 
-        channel = discord.utils.get(guild.text_channels, name=expected_channel_name)
-        if channel:
-            region_channels[code] = channel
-        else:
-            print(f"[RBA] No channel found for {county_name} ({code})")
+    async def fetch_one(region_code):
+        async with semaphore:
+            try:
+                # Scheduled runs always go to eBird and warm the cache for !rba
+                with metrics.timed("rba_stage_seconds", stage="fetch"):
+                    return region_code, await fetch_ebird_rba(region_code, refresh=True)
+            except Exception as e:
+                return region_code, e
 
-    return region_channels
+    pending = [asyncio.create_task(fetch_one(code)) for code in region_codes]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
 
-async def rba_task(region_channels: dict):
+async def fetch_regions(region_codes, statewide: bool = RBA_STATEWIDE_INGEST):
     """
-    Fetch RBA for all counties and post notable observations to their corresponding channel.
+    Yield (region_code, result) pairs for every region, like
+    fetch_regions_concurrently. In statewide mode one US-CO request is
+    partitioned locally, and only counties it cannot fully cover are fetched
+    one by one.
     """
-    for region_code, channel in region_channels.items():
+    region_codes = list(region_codes)
+    if not region_codes:
+        return
+    if statewide:
         try:
-            recent_obs_dicts = fetch_ebird_rba(region_code)
-            recent_obs = []
+            with metrics.timed("rba_stage_seconds", stage="fetch_statewide"):
+                buckets, region_codes = await fetch_statewide_rba(region_codes)
+        except EBirdError as e:
+            print(f"[RBA] Statewide fetch failed, falling back to per-county: {e}")
+        else:
+            if region_codes:
+                print(f"[RBA] Statewide result truncated, fetching {len(region_codes)} counties individually")
+            for region_code, bucket in buckets.items():
+                yield region_code, bucket
+
+    async for item in fetch_regions_concurrently(region_codes):
+        yield item
 
-            for d in recent_obs_dicts:
-                lat = d.get("lat")
-                lon = d.get("lng")
-                try:
-                    tz_name = get_timezone_name(lat, lon) if lat is not None and lon is not None else "UTC"
-                except Exception:
-                    tz_name = "UTC"
+# One post per county at a time, so a poll and a digest cannot post the same delta twice
+_region_locks: dict[str, asyncio.Lock] = {}
 
-                try:
-                    obs_utc = ebird_local_to_utc(d.get("obsDt"), lat, lon)
-                except Exception:
-                    continue  # Skip malformed dates
+async def post_region(channel, region_code: str, result, delta: bool = RBA_DELTA_POSTING):
+    """Turn one county's fetch result into observations, post them and save the checklists."""
+    async with _region_locks.setdefault(region_code, asyncio.Lock()):
+        await _post_region(channel, region_code, result, delta)
 
-                obs = Observation(
-                    checklist_id=d.get("subId"),
-                    species=d.get("comName"),
-                    region=region_code,
-                    location=d.get("locName", "Unknown"),
-                    observer=d.get("userDisplayName", "Unknown"),
-                    obs_datetime=obs_utc,
-                    local_tz=tz_name,
-                    thread_tracker_key=None,
-                    lat=lat,
-                    lon=lon,
-                    has_media=bool(d.get("hasRichMedia", []))
-                )
-                recent_obs.append(obs)
+async def _post_region(channel, region_code: str, result, delta: bool):
+    region_start = time.perf_counter()
+    try:
+        if isinstance(result, Exception):
+            raise result
 
-            if recent_obs:
-                messages = chunked_rba_messages(recent_obs)
-                for msg in messages:
-                    await channel.send(msg, silent=True)
+        with metrics.timed("rba_stage_seconds", stage="ingest"):
+            recent_obs = build_observations(result, region_code)
 
-            # Save checklists regardless of posting
-            for obs in recent_obs:
-                save_checklist(obs)
+        # Clustering, rendering and the Discord sends themselves (including queueing)
+        with metrics.timed("rba_stage_seconds", stage="post"):
+            if recent_obs and delta:
+                plan = await post_rba_delta(channel, region_code, recent_obs)
+                print(f"[RBA] {channel.name}: {len(plan.new)} new, {len(plan.edits)} edited, "
+                      f"{plan.unchanged} unchanged clusters")
+            elif recent_obs:
+                # Each message is queued as soon as it is rendered; the send queue paces it per channel
+                await outbound.send_all(channel, iter_rba_messages(recent_obs), silent=True)
 
-            print(f"[RBA] Posted {len(recent_obs)} observations to {channel.name}")
+        # Save checklists regardless of posting
+        with metrics.timed("rba_stage_seconds", stage="db_write"):
+            await database.write(save_checklists, recent_obs)
 
-        except Exception as e:
-            print(f"[RBA] Error processing region {region_code}: {e}")
\ No newline at end of file
+        print(f"[RBA] Posted {len(recent_obs)} observations to {channel.name}")
+
+    except Exception as e:
+        metrics.inc("rba_region_errors_total")
+        print(f"[RBA] Error processing region {region_code}: {e}")
+    finally:
+        metrics.observe("rba_region_seconds", time.perf_counter() - region_start, region=region_code)
+
+async def rba_task(region_channels: dict, delta: bool = RBA_DELTA_POSTING, prefetched: dict | None = None):
+    """
+    Fetch RBA for all counties and post notable observations to their corresponding channel.
+    Counties are fetched concurrently; each one is handed to the send queue as soon as its
+    data arrives, so slow channels do not hold up the rest.
+    In delta mode only new or changed clusters are posted (or edited in place).
+    Counties in `prefetched` (region_code -> eBird rows, e.g. from the poll scheduler)
+    are posted from that data instead of being fetched again.
+    """
+    run_start = time.perf_counter()
+    prefetched = {code: rows for code, rows in (prefetched or {}).items() if code in region_channels}
+    posting = [asyncio.create_task(post_region(region_channels[region_code], region_code, rows, delta))
+               for region_code, rows in prefetched.items()]
+    to_fetch = [code for code in region_channels if code not in prefetched]
+    if prefetched:
+        print(f"[RBA] Using polled data for {len(prefetched)} counties, fetching {len(to_fetch)}")
+    posting += [asyncio.create_task(post_region(region_channels[region_code], region_code, result, delta))
+                async for region_code, result in fetch_regions(to_fetch)]
+    await asyncio.gather(*posting)
+    metrics.observe("rba_run_seconds", time.perf_counter() - run_start)
+    print(f"[RBA] Send queue: {outbound.stats()}")
+    if delta:
+        await prune_posted()
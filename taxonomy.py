@@ -0,0 +1,72 @@
+# taxonomy.py
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class TaxonEntry:
+    species_code: str
+    com_name: str
+    banding_codes: tuple[str, ...] = ()
+    com_name_codes: tuple[str, ...] = ()
+
+    @classmethod
+    def from_ebird(cls, d: dict) -> "TaxonEntry":
+        return cls(
+            species_code=d["speciesCode"],
+            com_name=d["comName"],
+            banding_codes=tuple(d.get("bandingCodes") or ()),
+            com_name_codes=tuple(d.get("comNameCodes") or ()),
+        )
+
+
+class TaxonomyIndex:
+    """
+    Hash-map lookups over the eBird taxonomy, built once per taxonomy load.
+
+    Codes are matched upper-case and common names lower-case. Every lookup
+    returns a precomputed tuple in taxonomy order, so callers can tell a
+    unique answer from one that needs disambiguation without scanning.
+    """
+
+    def __init__(self, entries):
+        self.entries: tuple[TaxonEntry, ...] = tuple(entries)
+        self.by_species_code: dict[str, TaxonEntry] = {}
+
+        by_banding_code = defaultdict(list)
+        by_com_name_code = defaultdict(list)
+        by_com_name = defaultdict(list)
+        for entry in self.entries:
+            self.by_species_code[entry.species_code] = entry
+            for code in entry.banding_codes:
+                by_banding_code[code.upper()].append(entry)
+            for code in entry.com_name_codes:
+                by_com_name_code[code.upper()].append(entry)
+            by_com_name[entry.com_name.lower()].append(entry)
+
+        self.by_banding_code = {k: tuple(v) for k, v in by_banding_code.items()}
+        self.by_com_name_code = {k: tuple(v) for k, v in by_com_name_code.items()}
+        self.by_com_name = {k: tuple(v) for k, v in by_com_name.items()}
+
+    @classmethod
+    def from_ebird(cls, taxonomy_data) -> "TaxonomyIndex":
+        return cls(TaxonEntry.from_ebird(d) for d in taxonomy_data)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def species(self, species_code: str) -> TaxonEntry | None:
+        return self.by_species_code.get(species_code)
+
+    def names_for_banding_code(self, code: str) -> tuple[str, ...]:
+        return tuple(e.com_name for e in self.by_banding_code.get(code.upper(), ()))
+
+    def names_for_com_name_code(self, code: str) -> tuple[str, ...]:
+        return tuple(e.com_name for e in self.by_com_name_code.get(code.upper(), ()))
+
+    def entries_for_name(self, com_name: str) -> tuple[TaxonEntry, ...]:
+        return self.by_com_name.get(com_name.strip().lower(), ())
+
+    def banding_codes_for_name(self, com_name: str) -> list[tuple[str, ...]]:
+        """Banding-code sets of every species with this common name that has any."""
+        return [e.banding_codes for e in self.entries_for_name(com_name) if e.banding_codes]
@@ -0,0 +1,167 @@
+# taxonomy_store.py
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from json_stream import iter_json_array_file
+from taxonomy import TaxonEntry, TaxonomyIndex
+
+TAXONOMY_DB_FILE = "./data/taxonomy.db"
+LEGACY_SNAPSHOT_FILE = "taxonomy_snapshot.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS taxa (
+    species_code TEXT PRIMARY KEY,
+    com_name TEXT NOT NULL,
+    banding_codes TEXT NOT NULL DEFAULT '',
+    com_name_codes TEXT NOT NULL DEFAULT '',
+    taxon_order REAL
+);
+"""
+
+
+@dataclass
+class TaxonomyDiff:
+    name_changes: list[tuple[str, str]] = field(default_factory=list)  # (old comName, new comName)
+    new_species: list[str] = field(default_factory=list)  # speciesCodes
+
+
+def _taxon_row(d: dict) -> tuple:
+    # Codes never contain spaces, so a space-joined string keeps rows compact
+    return (d["speciesCode"], d["comName"], " ".join(d.get("bandingCodes") or ()),
+            " ".join(d.get("comNameCodes") or ()), d.get("taxonOrder"))
+
+
+class TaxonomyStore:
+    """
+    Local copy of the eBird taxonomy in a single SQLite file, tagged with the
+    eBird taxonomy version it was downloaded from. Every method opens its own
+    connection, so the store can be used from worker threads.
+    """
+
+    def __init__(self, path: str = TAXONOMY_DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def version(self) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM taxa").fetchone()[0]
+
+    def load_index(self) -> TaxonomyIndex:
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT species_code, com_name, banding_codes, com_name_codes
+                FROM taxa ORDER BY taxon_order, species_code
+            """)
+            return TaxonomyIndex(
+                TaxonEntry(code, name, tuple(bc.split()), tuple(cnc.split()))
+                for code, name, bc, cnc in rows
+            )
+        finally:
+            conn.close()
+
+    def begin_update(self) -> "TaxonomyUpdate":
+        """Start a staged replacement; feed it entries with add() and finish with commit()."""
+        return TaxonomyUpdate(self)
+
+    def apply_update(self, taxonomy_data, version: str) -> TaxonomyDiff:
+        """
+        Replace the stored taxonomy with `taxonomy_data` (any iterable of
+        eBird taxon dicts, e.g. a streaming parser) and record `version`.
+        """
+        update = self.begin_update()
+        try:
+            update.add(taxonomy_data)
+            return update.commit(version)
+        finally:
+            update.close()
+
+    def import_legacy_snapshot(self, path: str = LEGACY_SNAPSHOT_FILE) -> bool:
+        """Seed an empty store from the old taxonomy_snapshot.json, if present."""
+        if self.count() or not os.path.exists(path):
+            return False
+        self.apply_update(iter_json_array_file(path), "legacy-snapshot")
+        return True
+
+
+class TaxonomyUpdate:
+    """
+    A taxonomy download being staged next to the stored one.
+
+    Entries are written to a temp table batch by batch as they are parsed, and
+    collected as compact TaxonEntry records for the new lookup index. commit()
+    finds renames and new species codes with a join against the stored rows,
+    so neither version is ever held in Python as raw JSON. Calls may come from
+    different worker threads, but not concurrently.
+    """
+
+    def __init__(self, store: TaxonomyStore):
+        self.conn = sqlite3.connect(store.path, check_same_thread=False)
+        self.conn.execute("CREATE TEMP TABLE taxa_new AS SELECT * FROM taxa WHERE 0")
+        self.entries: list[TaxonEntry] = []
+
+    def add(self, taxa) -> int:
+        """Stage a batch (any iterable) of eBird taxon dicts."""
+        rows = []
+        for d in taxa:
+            rows.append(_taxon_row(d))
+            self.entries.append(TaxonEntry.from_ebird(d))
+        self.conn.executemany("INSERT OR REPLACE INTO taxa_new VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def reset(self):
+        """Drop everything staged so far, e.g. when a download restarts."""
+        self.conn.execute("DELETE FROM taxa_new")
+        self.entries = []
+
+    def commit(self, version: str) -> TaxonomyDiff:
+        """Swap the staged rows in, record `version` and return what changed."""
+        conn = self.conn
+        diff = TaxonomyDiff()
+        had_previous = conn.execute("SELECT EXISTS(SELECT 1 FROM taxa)").fetchone()[0]
+        if had_previous:
+            diff.name_changes = conn.execute("""
+                SELECT old.com_name, new.com_name
+                FROM taxa_new new JOIN taxa old USING (species_code)
+                WHERE old.com_name != new.com_name
+            """).fetchall()
+            diff.new_species = [r[0] for r in conn.execute("""
+                SELECT new.species_code
+                FROM taxa_new new LEFT JOIN taxa old USING (species_code)
+                WHERE old.species_code IS NULL
+            """)]
+
+        with conn:
+            conn.execute("DELETE FROM taxa")
+            conn.execute("INSERT INTO taxa SELECT * FROM taxa_new")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(version),))
+        return diff
+
+    def index(self) -> TaxonomyIndex:
+        """Lookup index over the staged entries."""
+        return TaxonomyIndex(self.entries)
+
+    def close(self):
+        self.conn.close()
+
+
+def latest_version(versions: list[dict]) -> str | None:
+    """Pick the current authority version from /ref/taxonomy/versions."""
+    for v in versions:
+        if v.get("latest"):
+            return str(v.get("authorityVer"))
+    return str(versions[-1].get("authorityVer")) if versions else None
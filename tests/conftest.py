@@ -0,0 +1,30 @@
+# conftest.py
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# The bot's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Observation  # noqa: E402
+
+NOW = datetime.now(timezone.utc)
+
+
+def observation(checklist_id: str = "S1", species: str = "Snowy Owl", *, region: str = "US-CO-013",
+                location: str = "Walden Ponds", observer: str = "A", hours_ago: float = 1,
+                obs_datetime: datetime | None = None, lat: float | None = 40.0,
+                lon: float | None = -105.2) -> Observation:
+    """An Observation for tests, seen `hours_ago` before NOW unless obs_datetime is given."""
+    return Observation(
+        checklist_id=checklist_id,
+        species=species,
+        region=region,
+        location=location,
+        observer=observer,
+        obs_datetime=obs_datetime or NOW - timedelta(hours=hours_ago),
+        local_tz="America/Denver",
+        thread_tracker_key=None,
+        lat=lat,
+        lon=lon,
+    )
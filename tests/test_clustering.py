@@ -0,0 +1,92 @@
+# test_clustering.py
+import random
+from datetime import datetime, timezone
+import pytest
+from clustering import ClusterIndex, cluster_observations_batch, haversine, normalize_species_name
+from conftest import observation
+from models import Observation
+
+SPECIES = ["Snowy Owl", "Snowy Owl (Arctic)", "Harris's Sparrow", "Black Rail", "Rusty Blackbird"]
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_observations(n: int, seed: int, spread: float = 0.2) -> list[Observation]:
+    """Random sightings packed tightly enough that many fall within 2 km of each other."""
+    rng = random.Random(seed)
+    sites = [(39.7 + rng.uniform(-spread, spread), -105.0 + rng.uniform(-spread, spread)) for _ in range(n // 4 + 1)]
+    observations = []
+    for i in range(n):
+        lat, lon = rng.choice(sites)
+        if rng.random() < 0.5:  # jitter off the shared site so clusters are not just identical points
+            lat, lon = lat + rng.uniform(-0.02, 0.02), lon + rng.uniform(-0.02, 0.02)
+        no_coords = rng.random() < 0.05
+        observations.append(observation(
+            f"S{i}", rng.choice(SPECIES), region="US-CO-031", location=f"Site {rng.randrange(5)}",
+            observer=f"Observer {rng.randrange(10)}", obs_datetime=NOW,
+            lat=None if no_coords else lat, lon=None if no_coords else lon,
+        ))
+    return observations
+
+
+def reference_clusters(observations, threshold_km=2):
+    """The original linear scan: join the earliest same-species anchor within range."""
+    clusters = {}
+    for obs in observations:
+        name = normalize_species_name(obs.species)
+        for key in clusters:
+            if normalize_species_name(key[0]) != name:
+                continue
+            if obs.lat is None or obs.lon is None or key[1] is None or key[2] is None:
+                if obs.lat is None and key[1] is None and (obs.location or "Unknown") == key[3]:
+                    break
+                continue
+            if haversine(obs.lat, obs.lon, key[1], key[2]) <= threshold_km:
+                break
+        else:
+            key = (obs.species, obs.lat, obs.lon, obs.location or "Unknown")
+            clusters[key] = []
+        clusters[key].append(obs)
+    return clusters
+
+
+def as_ids(clusters) -> dict:
+    return {key: [o.checklist_id for o in members] for key, members in clusters.items()}
+
+
+def index_clusters(observations, threshold_km=2):
+    index = ClusterIndex(threshold_km)
+    for obs in observations:
+        index.add(obs)
+    return index.clusters
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cluster_index_matches_reference(seed):
+    observations = make_observations(400, seed)
+    assert as_ids(index_clusters(observations)) == as_ids(reference_clusters(observations))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_cluster_index(seed):
+    pytest.importorskip("numpy")
+    observations = make_observations(3000, seed)
+    assert as_ids(cluster_observations_batch(observations)) == as_ids(index_clusters(observations))
+
+
+def test_species_variants_share_a_cluster():
+    a = observation("S1", "Snowy Owl", lat=39.7, lon=-105.0)
+    b = observation("S2", "Snowy Owl (Arctic)", lat=39.705, lon=-105.0)
+    assert len(index_clusters([a, b])) == 1
+
+
+def test_points_beyond_threshold_stay_apart():
+    a = observation("S1", "Black Rail", lat=39.7, lon=-105.0)
+    b = observation("S2", "Black Rail", lat=39.75, lon=-105.0)  # about 5.6 km apart
+    assert len(index_clusters([a, b])) == 2
+
+
+def test_loc_id_joins_its_cluster_without_a_distance_check():
+    a = observation("S1", "Black Rail", lat=39.7, lon=-105.0)
+    b = observation("S2", "Black Rail", lat=39.75, lon=-105.0)
+    a.loc_id = b.loc_id = "L123"
+    assert len(index_clusters([a, b])) == 1
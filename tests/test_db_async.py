@@ -0,0 +1,78 @@
+# test_db_async.py
+import asyncio
+import pytest
+import db
+from conftest import observation
+from db_async import AsyncDatabase
+
+
+class Boom(Exception):
+    pass
+
+
+def save_then_fail(observations):
+    db.save_checklists(observations)
+    raise Boom("job failed after writing")
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "test.db"))
+    # A long window so every write in a test lands in the same group commit
+    return AsyncDatabase(commit_window=0.2)
+
+
+@pytest.fixture
+def heard():
+    batches = []
+
+    def listener(observations):
+        batches.append([obs.checklist_id for obs in observations])
+
+    db.add_checklist_listener(listener)
+    yield batches
+    db.remove_checklist_listener(listener)
+
+
+def run_batch(database, jobs):
+    """Submit `jobs` ((fn, *args) tuples) together; return their outcomes and which checklists were stored."""
+    async def main():
+        await database.start()
+        try:
+            results = await asyncio.gather(*(database.write(*job) for job in jobs), return_exceptions=True)
+            stored = [cid for cid in ("S1", "S2", "S3") if await database.read(db.get_checklist, cid)]
+        finally:
+            await database.stop()
+        return results, stored
+
+    return asyncio.run(main())
+
+
+def test_failing_job_rolls_back_only_its_own_savepoint(database):
+    results, stored = run_batch(database, [
+        (db.save_checklists, [observation("S1")]),
+        (save_then_fail, [observation("S2")]),
+        (db.save_checklists, [observation("S3")]),
+    ])
+
+    assert database.commits == 1 and database.writes == 3  # one group commit
+    assert results[0] == 1 and results[2] == 1
+    assert isinstance(results[1], Boom)
+    assert stored == ["S1", "S3"]
+
+
+def test_listeners_only_hear_committed_jobs(database, heard):
+    run_batch(database, [
+        (db.save_checklists, [observation("S1")]),
+        (save_then_fail, [observation("S2")]),
+        (db.save_checklists, [observation("S3")]),
+    ])
+    assert heard == [["S1"], ["S3"]]
+
+
+def test_batch_without_failures_commits_everything(database, heard):
+    results, stored = run_batch(database, [(db.save_checklists, [observation(cid)]) for cid in ("S1", "S2", "S3")])
+
+    assert results == [1, 1, 1]
+    assert stored == ["S1", "S2", "S3"]
+    assert heard == [["S1"], ["S2"], ["S3"]]
@@ -0,0 +1,89 @@
+# test_db_schema.py
+import sqlite3
+import pytest
+import db_schema
+from db_schema import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+
+# checklists as created before user_version migrations existed
+LEGACY_CHECKLISTS = """
+CREATE TABLE checklists (
+    checklist_id TEXT PRIMARY KEY,
+    species TEXT NOT NULL,
+    region TEXT NOT NULL,
+    observer TEXT,
+    obs_datetime TEXT NOT NULL,
+    thread_tracker_key TEXT
+)
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(tmp_path / "test.db")
+    yield connection
+    connection.close()
+
+
+def columns(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def indexes(conn) -> set[str]:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_fresh_database_reaches_latest_version(conn):
+    assert migrate(conn) == SCHEMA_VERSION
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"threads", "checklists", "moderation_queue", "misses", "regions", "posted_clusters"} <= tables
+    assert {"idx_checklists_thread", "idx_checklists_region_time", "idx_posted_clusters_message"} <= indexes(conn)
+    assert {"location", "lat", "lon", "local_tz"} <= columns(conn, "checklists")
+    assert "updated_at" in columns(conn, "regions")
+
+
+def test_migrate_is_idempotent(conn):
+    migrate(conn)
+    assert migrate(conn) == SCHEMA_VERSION
+
+
+def test_legacy_database_keeps_its_rows(conn):
+    conn.execute(LEGACY_CHECKLISTS)
+    conn.execute("INSERT INTO checklists VALUES ('S1', 'Snowy Owl', 'US-CO-013', 'A', '2025-01-01T00:00:00+00:00', NULL)")
+    conn.commit()
+    assert get_schema_version(conn) == 0
+
+    migrate(conn)
+
+    assert {"location", "lat", "lon", "local_tz"} <= columns(conn, "checklists")
+    assert conn.execute("SELECT checklist_id, species, location FROM checklists").fetchall() == \
+        [("S1", "Snowy Owl", None)]
+
+
+def test_stepwise_upgrade_matches_fresh_install(conn, tmp_path):
+    migrate(conn, target=2)
+    assert get_schema_version(conn) == 2
+    assert "local_tz" not in columns(conn, "checklists")
+    migrate(conn)
+
+    fresh = sqlite3.connect(tmp_path / "fresh.db")
+    migrate(fresh)
+    for table in ("threads", "checklists", "posted_clusters"):
+        assert columns(conn, table) == columns(fresh, table)
+    assert indexes(conn) == indexes(fresh)
+    fresh.close()
+
+
+def test_failed_migration_rolls_back(conn, monkeypatch):
+    migrate(conn)
+    broken = MIGRATIONS + [(SCHEMA_VERSION + 1, [
+        "CREATE TABLE half_done (id INTEGER)",
+        "THIS IS NOT SQL",
+    ])]
+    monkeypatch.setattr(db_schema, "MIGRATIONS", broken)
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, target=SCHEMA_VERSION + 1)
+
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert "half_done" not in {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
@@ -0,0 +1,69 @@
+# test_discord_messages.py
+from conftest import observation
+from discord_messages import MAX_DISCORD_MSG_LEN, chunked_rba_messages, iter_rba_messages, pack_messages, render_cluster
+
+
+def block(tag: str, lines: int, width: int = 50) -> tuple[str, list[str]]:
+    return tag, [f"{tag}{i}".ljust(width, ".") for i in range(lines)] + [""]
+
+
+def test_pack_keeps_every_line_in_order_within_the_limit():
+    blocks = [block(f"b{n}", lines=n % 7 + 1) for n in range(60)]
+    messages = list(pack_messages(iter(blocks), limit=500))
+
+    assert all(len(text) <= 500 for text, _ in messages)
+    assert "\n".join(text for text, _ in messages).split("\n") == [line for _, lines in blocks for line in lines]
+
+
+def test_pack_does_not_split_a_block_that_fits():
+    blocks = [block(f"b{n}", lines=3) for n in range(20)]
+    for text, tags in pack_messages(iter(blocks), limit=400):
+        for tag in tags:
+            _, lines = blocks[int(tag[1:])]
+            assert "\n".join(lines[:-1]) in text
+
+
+def test_pack_splits_an_oversized_block_between_lines():
+    tag, lines = block("big", lines=30)
+    messages = list(pack_messages([(tag, lines)], limit=300))
+
+    assert len(messages) > 1
+    assert all(len(text) <= 300 and tags == ["big"] for text, tags in messages)
+    assert "\n".join(text for text, _ in messages).split("\n") == lines
+
+
+def test_pack_streams_before_consuming_all_blocks():
+    consumed = []
+
+    def blocks():
+        for n in range(50):
+            consumed.append(n)
+            yield block(f"b{n}", lines=5)
+
+    first_text, _ = next(pack_messages(blocks(), limit=400))
+    assert first_text
+    assert len(consumed) < 50
+
+
+def test_render_wraps_long_observer_lists():
+    many = [observation(f"S{i}", observer=f"Observer with a rather long display name {i}", hours_ago=i / 60) for i in range(40)]
+    lines = render_cluster(("Snowy Owl", 39.7, -105.2, "Walden Ponds"), many, limit=300)
+
+    assert all(len(line) < 300 for line in lines)
+    assert lines[-1] == ""
+    assert sum(line.startswith("▸ … ") for line in lines) >= 1  # observer list continued on a new line
+    assert lines[-2].endswith("and 29 more")  # 39 other observers, 10 listed
+
+
+def test_rba_messages_fit_discord_and_cover_each_cluster():
+    observations = [observation(f"S{i}", f"Species {i % 40}", observer=f"Observer {i}", hours_ago=i / 60,
+                                lat=39.0 + (i % 40) * 0.1) for i in range(400)]
+    messages = chunked_rba_messages(observations)
+
+    assert all(len(text) <= MAX_DISCORD_MSG_LEN for text in messages)
+    text = "\n".join(messages)
+    assert all(f"**Species {n}**" in text for n in range(40))
+
+
+def test_rba_messages_for_an_empty_region():
+    assert list(iter_rba_messages([])) == ["No notable observations in this region."]
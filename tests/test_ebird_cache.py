@@ -0,0 +1,51 @@
+# test_ebird_cache.py
+import asyncio
+from ebird_cache import AsyncTTLCache
+
+
+class CountingFetch:
+    def __init__(self, value="rows"):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.value
+
+
+def test_concurrent_lookups_share_one_fetch_and_one_miss():
+    async def main():
+        cache = AsyncTTLCache(ttl=60, maxsize=8)
+        fetch = CountingFetch()
+        results = await asyncio.gather(*(cache.get_or_fetch("US-CO-013", fetch) for _ in range(5)))
+        await cache.get_or_fetch("US-CO-013", fetch)
+        return cache, fetch, results
+
+    cache, fetch, results = asyncio.run(main())
+    assert results == ["rows"] * 5
+    assert fetch.calls == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 1)
+
+
+def test_refresh_bypasses_the_cached_value():
+    async def main():
+        cache = AsyncTTLCache(ttl=60, maxsize=8)
+        await cache.get_or_fetch("US-CO-013", CountingFetch("old"))
+        value = await cache.get_or_fetch("US-CO-013", CountingFetch("new"), refresh=True)
+        return cache, value, cache.get("US-CO-013")
+
+    cache, value, cached = asyncio.run(main())
+    assert value == cached == "new"
+    assert (cache.misses, cache.hits) == (2, 0)
+
+
+def test_expired_and_evicted_entries_are_gone():
+    cache = AsyncTTLCache(ttl=0, maxsize=8)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+    cache = AsyncTTLCache(ttl=60, maxsize=2)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") is None and len(cache) == 2
@@ -0,0 +1,63 @@
+# test_ebird_client.py
+import asyncio
+import pytest
+from aiohttp import web
+from ebird_client import EBirdClient, EBirdServerError
+
+
+async def with_server(bodies: list[str], call):
+    """Serve `bodies` in turn (the last one repeats) with status 200 and run `call(client)` against them."""
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        return web.Response(text=bodies[min(len(hits), len(bodies)) - 1], content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    client = EBirdClient(token="test", base_url=f"http://127.0.0.1:{port}", max_retries=2, backoff_base=0.0)
+    try:
+        return await call(client), hits
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_garbage_body_raises_a_server_error_after_retries():
+    async def call(client):
+        with pytest.raises(EBirdServerError) as excinfo:
+            await client.get_json("data/obs/US-CO/recent/notable")
+        return excinfo.value
+
+    error, hits = asyncio.run(with_server(["<html>Service Unavailable</html>"], call))
+    assert error.status == 200
+    assert len(hits) == 3
+
+
+def test_truncated_body_is_retried():
+    async def call(client):
+        return await client.get_json("data/obs/US-CO/recent/notable")
+
+    data, hits = asyncio.run(with_server(['[{"speciesCode": "snoowl1"', '[{"speciesCode": "snoowl1"}]'], call))
+    assert data == [{"speciesCode": "snoowl1"}]
+    assert len(hits) == 2
+
+
+def test_unclosed_streamed_array_raises_a_server_error():
+    async def call(client):
+        batches = []
+
+        async def on_batch(items):
+            batches.append(items)
+
+        with pytest.raises(EBirdServerError):
+            await client.stream_json_array("ref/taxonomy/ebird", on_batch)
+        return batches
+
+    _, hits = asyncio.run(with_server(['[{"a": 1}, {"b": 2}'], call))
+    assert len(hits) == 3
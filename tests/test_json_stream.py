@@ -0,0 +1,64 @@
+# test_json_stream.py
+import asyncio
+import json
+import pytest
+from json_stream import JsonArrayParser, aiter_json_array, iter_json_array, iter_json_array_file
+
+DOC = [
+    {"sciName": "Bubo scandiacus", "comName": "Snowy Owl", "taxonOrder": 2.5, "bandingCodes": ["SNOW"]},
+    {"sciName": "Laterallus jamaicensis", "comName": "Black Rail", "nested": {"a": [1, 2, {"b": "]"}]}},
+    12345,
+    -0.75e3,
+    "text with , and ] inside",
+    "Ñandú 🦤",
+    None,
+    True,
+]
+TEXT = json.dumps(DOC, indent=1)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+def test_any_chunking_yields_the_same_elements(size):
+    chunks = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+    assert list(iter_json_array(chunks)) == DOC
+
+
+def test_number_cut_at_a_chunk_boundary_is_not_truncated():
+    assert list(iter_json_array(["[1, 2.", "5, 3", "]"])) == [1, 2.5, 3]
+
+
+def test_elements_are_returned_as_soon_as_complete():
+    parser = JsonArrayParser()
+    assert parser.feed('[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': 2}]') == [{"b": 2}]
+    assert parser.close() == []
+
+
+def test_empty_array():
+    assert list(iter_json_array(["  [ ", " ] "])) == []
+
+
+def test_rejects_a_non_array_document():
+    with pytest.raises(ValueError):
+        list(iter_json_array(['{"a": 1}']))
+
+
+def test_rejects_an_unclosed_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array(['[1, 2']))
+
+
+def test_file_and_async_readers(tmp_path):
+    path = tmp_path / "taxonomy.json"
+    path.write_text(TEXT, encoding="utf-8")
+    assert list(iter_json_array_file(str(path), chunk_size=5)) == DOC
+
+    async def chunks():
+        data = TEXT.encode("utf-8")
+        for i in range(0, len(data), 3):  # splits multi-byte characters too
+            yield data[i:i + 3]
+
+    async def collect():
+        return [item async for item in aiter_json_array(chunks())]
+
+    assert asyncio.run(collect()) == DOC
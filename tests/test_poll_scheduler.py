@@ -0,0 +1,120 @@
+# test_poll_scheduler.py
+import asyncio
+import time
+import pytest
+import poll_scheduler
+from poll_scheduler import DAY, POLL_SOURCE, PollScheduler, county_activity, plan_intervals
+from rate_limit import RequestLog
+
+MIN, MAX = 15 * 60, 12 * 3600
+
+
+def polls_per_day(intervals: dict) -> float:
+    return sum(DAY / seconds for seconds in intervals.values())
+
+
+def test_plan_spends_the_budget_and_favours_busy_counties():
+    activity = {"busy": 100, "some": 4, **{f"quiet{i}": 0 for i in range(20)}}
+    intervals = plan_intervals(activity, 600, MIN, MAX)
+
+    assert polls_per_day(intervals) == pytest.approx(600)
+    assert intervals["busy"] < intervals["some"] < intervals["quiet0"]
+    assert all(MIN <= seconds <= MAX for seconds in intervals.values())
+
+
+def test_plan_clamps_to_the_interval_bounds():
+    intervals = plan_intervals({"a": 0, "b": 10_000}, 100_000, MIN, MAX)
+    assert intervals == {"a": MIN, "b": MIN}
+
+    # Just above 2 counties x 2 polls/day: the quiet county sits at the floor, the rest goes to the busy one
+    intervals = plan_intervals({"a": 0, "b": 1}, 4.5, MIN, MAX)
+    assert intervals["a"] == MAX
+    assert polls_per_day(intervals) == pytest.approx(4.5)
+
+
+def test_plan_shares_a_short_budget_evenly():
+    intervals = plan_intervals({f"c{i}": i for i in range(10)}, 5, MIN, MAX)
+    assert set(intervals.values()) == {DAY * 10 / 5}
+
+
+def test_county_activity_counts_distinct_species_and_locations():
+    rows = [{"speciesCode": "snoowl1", "locId": "L1"}, {"speciesCode": "snoowl1", "locId": "L1"},
+            {"speciesCode": "snoowl1", "locId": "L2"}, {"speciesCode": "blkrai", "locId": "L1"}]
+    assert county_activity(rows) == 3
+
+
+def test_request_log_rolls_off_old_requests():
+    log = RequestLog(window=600, resolution=60)
+    log.add(POLL_SOURCE, now=0)
+    log.add("other", now=30)
+    log.add(POLL_SOURCE, now=130)
+
+    assert log.count(now=200) == 3
+    assert log.count(POLL_SOURCE, now=200) == 2
+    assert log.frees_in(now=200) == 460
+    assert log.count(now=660) == 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = RequestLog()
+
+
+class NoChannels:
+    def for_region(self, code):
+        return None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(poll_scheduler, "get_client", lambda: fake)
+    return fake
+
+
+def test_other_traffic_comes_out_of_the_poll_allowance(client):
+    scheduler = PollScheduler(NoChannels(), budget=100)
+    for _ in range(30):
+        client.requests.add("other")
+    for _ in range(10):
+        client.requests.add(POLL_SOURCE)
+    assert scheduler.requests_today() == 40
+    assert scheduler.poll_allowance() == 70
+
+
+def test_snapshot_only_returns_fresh_rows(client):
+    scheduler = PollScheduler(NoChannels(), min_interval=MIN, max_interval=MAX)
+    now = time.time()
+    scheduler.intervals = {"fresh": 3600, "busy": 900, "stale": 3600}
+    scheduler.latest = {"fresh": (now - 600, ["a"]), "busy": (now - 1200, ["b"]), "stale": (now - 7200, ["c"])}
+
+    # "busy" is older than its own 15 min interval, "stale" older than an hour
+    assert scheduler.snapshot(max_age=3600) == {"fresh": ["a"]}
+
+
+def test_statewide_response_serves_several_polls(client, monkeypatch):
+    calls = []
+
+    async def statewide(codes):
+        calls.append("statewide")
+        return {"US-CO-001": [{"speciesCode": "snoowl1", "locId": "L1"}], "US-CO-003": []}, ["US-CO-005"]
+
+    async def county(code, refresh=False):
+        calls.append(code)
+        return []
+
+    monkeypatch.setattr(poll_scheduler, "fetch_statewide_rba", statewide)
+    monkeypatch.setattr(poll_scheduler, "fetch_ebird_rba", county)
+    scheduler = PollScheduler(NoChannels(), min_interval=MIN, max_interval=MAX, statewide=True)
+    scheduler.activity = {"US-CO-001": 0.0, "US-CO-003": 0.0, "US-CO-005": 0.0}
+
+    async def poll_all():
+        for code in scheduler.activity:
+            await scheduler.poll(code)
+
+    asyncio.run(poll_all())
+
+    # One statewide request covers two counties; the truncated one is fetched alone
+    assert calls == ["statewide", "US-CO-005"]
+    assert set(scheduler.latest) == {"US-CO-001", "US-CO-003", "US-CO-005"}
+    assert scheduler.activity["US-CO-001"] > scheduler.activity["US-CO-003"]
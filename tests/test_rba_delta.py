@@ -0,0 +1,85 @@
+# test_rba_delta.py
+from conftest import NOW, observation
+from models import PostedCluster
+from rba_delta import cluster_fingerprint, cluster_ids, has_news, plan_delta
+
+REGION = "US-CO-013"
+
+
+def posted_from(plan, message_id: int = 100) -> dict[str, PostedCluster]:
+    """What post_rba_delta would have saved after posting every new cluster in one message."""
+    return {c.cluster_id: PostedCluster(REGION, c.cluster_id, c.fingerprint, 1, message_id, NOW) for c in plan.new}
+
+
+def test_everything_is_new_the_first_time():
+    observations = [observation("S1"), observation("S2", species="Black Rail", lat=39.0)]
+    plan = plan_delta(observations, {})
+    assert len(plan.new) == 2 and not plan.edits and plan.unchanged == 0
+
+
+def test_unchanged_clusters_are_left_alone():
+    observations = [observation("S1"), observation("S2", observer="B")]
+    posted = posted_from(plan_delta(observations, {}))
+    plan = plan_delta(observations, posted)
+    assert not plan.new and not plan.edits and plan.unchanged == 1
+
+
+def test_observer_ageing_out_is_not_news():
+    observations = [observation("S1", hours_ago=1), observation("S2", hours_ago=23, observer="B")]
+    posted = posted_from(plan_delta(observations, {}))
+    plan = plan_delta(observations[:1], posted)
+    assert not plan.new and not plan.edits and plan.unchanged == 1
+
+
+def test_new_checklist_edits_the_whole_message():
+    observations = [observation("S1"), observation("S2", species="Black Rail", lat=39.0)]
+    posted = posted_from(plan_delta(observations, {}))
+
+    plan = plan_delta(observations + [observation("S3", observer="C")], posted)
+
+    assert not plan.new
+    assert list(plan.edits) == [100]
+    assert {c.cluster_id for c in plan.edits[100]} == set(posted)
+
+
+def test_changed_cluster_is_reposted_when_the_edit_no_longer_fits():
+    observations = [observation("S1"), observation("S2", species="Black Rail", lat=39.0)]
+    posted = posted_from(plan_delta(observations, {}))
+    more = [observation(f"S{i}", observer=f"Observer {i}") for i in range(3, 40)]
+
+    plan = plan_delta(observations + more, posted, limit=600)
+
+    assert not plan.edits
+    assert [c.cluster_id for c in plan.new] == ["snowy owl|Walden Ponds"]
+    assert plan.unchanged == 1
+
+
+def test_has_news():
+    assert has_news("S1 S2", "S1 S2 S3")
+    assert not has_news("S1 S2", "S2")
+    assert not has_news("S1 S2", "S1 S2")
+    assert has_news("0123456789abcdef", "S1")  # fingerprint saved by the old hashing scheme
+
+
+def test_fingerprint_ignores_order_and_duplicates():
+    a, b = observation("S1"), observation("S2")
+    assert cluster_fingerprint([a, b, a]) == cluster_fingerprint([b, a]) == "S1 S2"
+
+
+def test_cluster_ids_are_unique_and_order_independent():
+    keys = [
+        ("Snowy Owl", 40.0, -105.2, "Private"),
+        ("Snowy Owl", 39.5, -104.9, "Private"),
+        ("Black Rail", 40.0, -105.2, "Private"),
+    ]
+    ids = cluster_ids(keys)
+    assert len(set(ids)) == 3
+    assert ids[2] == "black rail|Private"  # a unique name keeps its plain id
+    assert cluster_ids(keys[::-1]) == ids[::-1]
+
+
+def test_colliding_location_names_keep_their_ids_across_runs():
+    near, far = observation("S1", location="Private"), observation("S2", location="Private", lat=39.5)
+    first = {c.cluster_id for c in plan_delta([near, far], {}).new}
+    second = {c.cluster_id for c in plan_delta([far, near], {}).new}
+    assert first == second and len(first) == 2
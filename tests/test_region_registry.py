@@ -0,0 +1,79 @@
+# test_region_registry.py
+from datetime import datetime, timezone
+import pytest
+import db
+from region_registry import Region, RegionRegistry, _upsert_regions
+
+REGIONS = [
+    Region("US-CO-013", "Boulder"),
+    Region("US-CO-041", "El Paso"),
+    Region("US-CO-069", "Larimer"),
+    Region("US-CO-101", "Pueblo"),
+    Region("US-CO-071", "Las Animas"),
+    Region("US-WY-001", "Albany"),
+]
+
+
+@pytest.fixture
+def registry():
+    return RegionRegistry(REGIONS)
+
+
+@pytest.mark.parametrize("query, code", [
+    ("US-CO-013", "US-CO-013"),
+    ("us-co-041", "US-CO-041"),
+    ("  Boulder ", "US-CO-013"),
+    ("el paso", "US-CO-041"),
+    ("El Paso County", "US-CO-041"),
+    ("paso", "US-CO-041"),
+    ("animas", "US-CO-071"),
+])
+def test_lookup(registry, query, code):
+    assert registry.lookup(query).code == code
+
+
+@pytest.mark.parametrize("query", ["", "   ", "Denver", "US-CO-999"])
+def test_lookup_misses(registry, query):
+    assert registry.lookup(query) is None
+
+
+def test_suggest_ranks_close_misspellings(registry):
+    assert [r.code for r in registry.suggest("Larmier")] == ["US-CO-069"]
+    assert registry.suggest("Boulder")[0].code == "US-CO-013"
+    assert registry.suggest("Xyzzy") == []
+    assert registry.suggest("") == []
+
+
+def test_suggest_respects_the_limit(registry):
+    assert len(registry.suggest("la", limit=1)) <= 1
+
+
+def test_counties_lists_one_state_by_name(registry):
+    assert [c["name"] for c in registry.counties("US-CO")] == ["Boulder", "El Paso", "Larimer", "Las Animas", "Pueblo"]
+    assert registry.counties("US-WY") == [{"code": "US-WY-001", "name": "Albany"}]
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "test.db"))
+    yield db.get_connection()
+    db.close_connection()
+
+
+def test_refresh_time_survives_a_reload(tmp_db):
+    assert RegionRegistry().load().refreshed_at is None
+
+    refreshed_at = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+    _upsert_regions([{"code": "US-CO-013", "name": "Boulder"}], refreshed_at)
+
+    registry = RegionRegistry().load()
+    assert registry.refreshed_at == refreshed_at
+    assert registry.lookup("boulder").code == "US-CO-013"
+
+
+def test_rows_from_before_the_refresh_column_count_as_never_refreshed(tmp_db):
+    tmp_db.execute("INSERT INTO regions (code, name) VALUES ('US-CO-013', 'Boulder')")
+    tmp_db.commit()
+
+    registry = RegionRegistry().load()
+    assert len(registry) == 1 and registry.refreshed_at is None
@@ -0,0 +1,140 @@
+# test_send_queue.py
+import asyncio
+import itertools
+import pytest
+from send_queue import BULK, DISCORD_MSG_LIMIT, INTERACTIVE, OutboundQueue, PriorityPacer
+
+_ids = itertools.count(1)
+
+
+class FakeChannel:
+    """Records sends; while `gate` is set, each send waits for it to open."""
+
+    def __init__(self, sent: list | None = None):
+        self.id = next(_ids)
+        self.sent = [] if sent is None else sent  # shared list to see the order across channels
+        self.gate: asyncio.Event | None = None
+
+    async def send(self, content=None, **kwargs):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(content)
+        return f"message {len(self.sent)}"
+
+
+def fast_queue(**kwargs) -> OutboundQueue:
+    return OutboundQueue(global_rate=1000, channel_rate=1000, channel_burst=1000, **kwargs)
+
+
+def test_interactive_reply_jumps_ahead_of_queued_bulk():
+    async def main():
+        queue = fast_queue(coalesce=False)
+        channel = FakeChannel()
+        channel.gate = asyncio.Event()
+        first = queue.submit(channel, "bulk 1")
+        await asyncio.sleep(0.01)  # "bulk 1" is in flight, held at the gate
+        rest = [queue.submit(channel, f"bulk {n}") for n in (2, 3)]
+        reply = queue.submit(channel, "reply", priority=INTERACTIVE)
+        channel.gate.set()
+        await asyncio.gather(first, reply, *rest)
+        return channel.sent
+
+    assert asyncio.run(main()) == ["bulk 1", "reply", "bulk 2", "bulk 3"]
+
+
+def test_pacer_grants_interactive_waiters_first():
+    async def main():
+        pacer = PriorityPacer(rate=1000, capacity=1)
+        pacer._tokens = 0  # everyone has to wait for a refill
+        granted = []
+
+        async def take(name, priority):
+            await pacer.acquire(priority)
+            granted.append(name)
+
+        await asyncio.gather(take("bulk 1", BULK), take("bulk 2", BULK), take("reply", INTERACTIVE))
+        return granted
+
+    assert asyncio.run(main()) == ["reply", "bulk 1", "bulk 2"]
+
+
+def test_each_channel_keeps_fifo_order():
+    async def main():
+        queue = fast_queue(coalesce=False)
+        shared = []
+        channels = [FakeChannel(shared) for _ in range(3)]
+        futures = [queue.submit(channel, f"{channel.id}:{n}") for n in range(20) for channel in channels]
+        await asyncio.gather(*futures)
+        return channels, shared
+
+    channels, shared = asyncio.run(main())
+    for channel in channels:
+        assert [m for m in shared if m.startswith(f"{channel.id}:")] == [f"{channel.id}:{n}" for n in range(20)]
+
+
+def test_coalesced_text_keeps_its_order_and_resolves_every_caller():
+    async def main():
+        queue = fast_queue()
+        channel = FakeChannel()
+        results = await asyncio.gather(*(queue.submit(channel, f"line {n}") for n in range(5)))
+        return queue, channel, results
+
+    queue, channel, results = asyncio.run(main())
+    assert channel.sent == ["\n".join(f"line {n}" for n in range(5))]
+    assert queue.coalesced == 4
+    assert set(results) == {"message 1"}
+
+
+@pytest.mark.parametrize("first, merged", [(DISCORD_MSG_LIMIT - 2, True), (DISCORD_MSG_LIMIT - 1, False)])
+def test_coalescing_stops_at_the_discord_limit(first, merged):
+    async def main():
+        queue = fast_queue()
+        channel = FakeChannel()
+        await asyncio.gather(queue.submit(channel, "a" * first), queue.submit(channel, "b"))
+        return channel.sent
+
+    sent = asyncio.run(main())
+    assert all(len(text) <= DISCORD_MSG_LIMIT for text in sent)
+    assert len(sent) == (1 if merged else 2)
+
+
+def test_sends_with_extra_arguments_are_not_merged():
+    async def main():
+        queue = fast_queue()
+        channel = FakeChannel()
+        await asyncio.gather(queue.submit(channel, "a"), queue.submit(channel, "b", embed=None))
+        return channel.sent
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_drain_waits_for_everything_queued():
+    async def main():
+        queue = fast_queue(coalesce=False)
+        channels = [FakeChannel() for _ in range(3)]
+        for n in range(10):
+            for channel in channels:
+                queue.submit(channel, str(n))
+        await queue.drain()
+        return queue, channels
+
+    queue, channels = asyncio.run(main())
+    assert queue.depth() == 0 and queue.sent == 30
+    assert all(len(channel.sent) == 10 for channel in channels)
+
+
+def test_close_cancels_unsent_messages():
+    async def main():
+        queue = fast_queue(coalesce=False)
+        channel = FakeChannel()
+        channel.gate = asyncio.Event()
+        futures = [queue.submit(channel, str(n)) for n in range(3)]
+        await asyncio.sleep(0.01)  # "0" is in flight, the rest are queued
+        await queue.close()
+        channel.gate.set()
+        await asyncio.sleep(0.01)
+        return queue, channel, futures
+
+    queue, channel, futures = asyncio.run(main())
+    assert all(future.cancelled() for future in futures)
+    assert channel.sent == [] and queue.depth() == 0
@@ -0,0 +1,105 @@
+# test_time_utils.py
+import json
+from datetime import datetime, timezone
+import pytest
+
+time_utils = pytest.importorskip("time_utils")  # needs timezonefinder
+
+
+class StubFinder:
+    """Stands in for TimezoneFinder; answers from a dict and counts lookups."""
+
+    def __init__(self, zones: dict):
+        self.zones = zones
+        self.calls = 0
+
+    def timezone_at(self, lat, lng):
+        self.calls += 1
+        return self.zones.get((lat, lng))
+
+
+@pytest.fixture
+def finder(monkeypatch):
+    stub = StubFinder({(21.3069, -157.8583): "Pacific/Honolulu", (46.87, -113.99): "America/Denver"})
+    monkeypatch.setattr(time_utils, "_tf", stub)
+    monkeypatch.setattr(time_utils, "_tz_cache", time_utils._LRUCache(2))
+    return stub
+
+
+def test_colorado_uses_the_fast_path(finder):
+    assert time_utils.get_timezone_name(39.74, -104.99) == "America/Denver"
+    assert finder.calls == 0
+
+
+def test_lookups_outside_colorado_are_cached(finder):
+    assert time_utils.get_timezone_name(21.3069, -157.8583) == "Pacific/Honolulu"
+    assert time_utils.get_timezone_name(21.30691, -157.85831) == "Pacific/Honolulu"  # rounds to the same key
+    assert finder.calls == 1
+
+
+def test_unknown_zone_falls_back_to_utc(finder):
+    assert time_utils.get_timezone_name(0.0, -30.0) == "UTC"  # mid-Atlantic
+    assert time_utils.ebird_local_to_utc("2025-01-01 12:00", 0.0, -30.0) == \
+        datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_missing_coordinates_are_rejected(finder):
+    with pytest.raises(ValueError):
+        time_utils.get_timezone_name(None, -105.0)
+
+
+def test_bad_datetime_type_is_rejected(finder):
+    with pytest.raises(TypeError):
+        time_utils.ebird_local_to_utc(1735732800, 39.74, -104.99)
+
+
+@pytest.mark.parametrize("obs_dt", ["2024-05-01", "2024-05-01T06:30", "2024-05-01 06:30:00", ""])
+def test_only_the_ebird_datetime_format_is_accepted(finder, obs_dt):
+    # Date-only obsDt (no start time) must not be read as local midnight
+    with pytest.raises(ValueError):
+        time_utils.ebird_local_to_utc(obs_dt, 39.74, -104.99)
+
+
+def test_ingest_skips_rows_without_a_start_time(finder):
+    from ingest import build_observations
+    rows = [
+        {"subId": "S1", "comName": "Snowy Owl", "lat": 39.74, "lng": -104.99, "obsDt": "2024-05-01 06:30"},
+        {"subId": "S2", "comName": "Snowy Owl", "lat": 39.74, "lng": -104.99, "obsDt": "2024-05-01"},
+    ]
+    observations = build_observations(rows, "US-CO-031")
+    assert [obs.checklist_id for obs in observations] == ["S1"]
+    assert observations[0].obs_datetime == datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("local, utc_hour", [
+    ("2025-01-15 07:30", 14),  # MST, UTC-7
+    ("2025-07-15 07:30", 13),  # MDT, UTC-6
+])
+def test_converts_across_daylight_saving(finder, local, utc_hour):
+    converted = time_utils.ebird_local_to_utc(local, 39.74, -104.99)
+    assert converted.tzinfo == timezone.utc
+    assert (converted.hour, converted.minute) == (utc_hour, 30)
+    assert time_utils.ebird_local_to_utc(datetime.fromisoformat(local), 39.74, -104.99) == converted
+
+
+def test_cache_is_bounded_and_persists(finder, tmp_path):
+    for lat, lon in [(21.3069, -157.8583), (46.87, -113.99), (0.0, -30.0)]:
+        time_utils.get_timezone_name(lat, lon)
+    assert len(time_utils._tz_cache) == 2  # the oldest entry was evicted
+
+    path = tmp_path / "tz_cache.json"
+    time_utils.save_tz_cache(str(path))
+    assert [entry[2] for entry in json.loads(path.read_text())] == ["America/Denver", "UTC"]
+
+    time_utils._tz_cache = time_utils._LRUCache(2)
+    assert time_utils.load_tz_cache(str(path)) == 2
+    calls = finder.calls
+    assert time_utils.get_timezone_name(46.87, -113.99) == "America/Denver"
+    assert finder.calls == calls
+
+
+def test_unreadable_cache_file_is_ignored(finder, tmp_path):
+    path = tmp_path / "tz_cache.json"
+    path.write_text("not json")
+    assert time_utils.load_tz_cache(str(path)) == 0
+    assert time_utils.load_tz_cache(str(tmp_path / "missing.json")) == 0
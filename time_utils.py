@@ -1,27 +1,99 @@
 # time_utils.py
-from datetime import datetime
+import atexit
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 from timezonefinder import TimezoneFinder
-import pytz
 
-tf = TimezoneFinder()
-_tz_cache = {}  # simple in-memory cache
+# Boxes known to lie entirely inside one zone: (min_lat, max_lat, min_lon, max_lon, zone)
+SINGLE_ZONE_REGIONS = [
+    (37.0, 41.0, -109.05, -102.05, "America/Denver"),  # Colorado
+]
+
+TZ_CACHE_SIZE = int(os.getenv("TZ_CACHE_SIZE", "4096"))
+TZ_CACHE_FILE = os.getenv("TZ_CACHE_FILE")  # optional, persists lookups across restarts
+
+_tf = None  # TimezoneFinder loads its polygon data lazily, only when a lookup needs it
+
+
+class _LRUCache:
+    """Small bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self):
+        return self._data.items()
+
+
+_tz_cache = _LRUCache(TZ_CACHE_SIZE)
+
+
+def _get_finder() -> TimezoneFinder:
+    global _tf
+    if _tf is None:
+        _tf = TimezoneFinder()
+    return _tf
+
 
 def get_timezone_name(lat: float, lon: float) -> str:
-    """Return timezone name for given coordinates, using cache."""
+    """Return timezone name for given coordinates, using the fast path or cache."""
     if lat is None or lon is None:
         raise ValueError("Latitude and longitude must be provided for timezone lookup.")
 
+    for min_lat, max_lat, min_lon, max_lon, zone in SINGLE_ZONE_REGIONS:
+        if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+            return zone
+
     key = (round(lat, 4), round(lon, 4))  # round to reduce duplicates
-    if key in _tz_cache:
-        return _tz_cache[key]
+    tz_name = _tz_cache.get(key)
+    if tz_name is not None:
+        return tz_name
 
-    tz_name = tf.timezone_at(lat=lat, lng=lon)
+    tz_name = _get_finder().timezone_at(lat=lat, lng=lon)
     if not tz_name:
         tz_name = 'UTC'  # fallback to UTC if unknown
 
-    _tz_cache[key] = tz_name
+    _tz_cache.put(key, tz_name)
     return tz_name
 
+
+@lru_cache(maxsize=None)
+def get_zone(tz_name: str) -> ZoneInfo:
+    """Return a shared zone object for `tz_name`."""
+    return ZoneInfo(tz_name)
+
+
+def parse_ebird_datetime(obs_dt: str) -> datetime:
+    """
+    Parse an eBird obsDt ("%Y-%m-%d %H:%M", naive local time). Anything else
+    raises ValueError, including date-only values from checklists without a
+    start time, which fromisoformat alone would read as midnight.
+    """
+    if len(obs_dt) != 16 or obs_dt[10] != " ":
+        raise ValueError(f"obsDt {obs_dt!r} is not in '%Y-%m-%d %H:%M' format")
+    return datetime.fromisoformat(obs_dt)  # much faster than strptime
+
+
 def ebird_local_to_utc(obs_datetime, lat: float, lon: float) -> datetime:
     """
     Convert an eBird observation datetime (naive local) to UTC using lat/lon.
@@ -33,14 +105,46 @@ def ebird_local_to_utc(obs_datetime, lat: float, lon: float) -> datetime:
         UTC-aware datetime
     """
     if isinstance(obs_datetime, str):
-        naive_local = datetime.strptime(obs_datetime, "%Y-%m-%d %H:%M")
+        naive_local = parse_ebird_datetime(obs_datetime)
     elif isinstance(obs_datetime, datetime):
         naive_local = obs_datetime
     else:
         raise TypeError("obs_datetime must be str or datetime")
 
-    tz_name = get_timezone_name(lat, lon)
-    local_tz = pytz.timezone(tz_name)
-    aware_local = local_tz.localize(naive_local)
-    utc_dt = aware_local.astimezone(pytz.UTC)
+    local_tz = get_zone(get_timezone_name(lat, lon))
+    aware_local = naive_local.replace(tzinfo=local_tz)
+    utc_dt = aware_local.astimezone(timezone.utc)
     return utc_dt
+
+
+# --------------------
+# Persistent cache
+# --------------------
+def load_tz_cache(path: str | None = TZ_CACHE_FILE) -> int:
+    """Load previously resolved coordinates from `path`. Returns entries loaded."""
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    for lat, lon, tz_name in entries[-_tz_cache.maxsize:]:
+        _tz_cache.put((lat, lon), tz_name)
+    return len(entries)
+
+
+def save_tz_cache(path: str | None = TZ_CACHE_FILE):
+    """Write the resolved-coordinate cache to `path` (least recent first)."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump([[lat, lon, tz] for (lat, lon), tz in _tz_cache.items()], f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+if TZ_CACHE_FILE:
+    load_tz_cache(TZ_CACHE_FILE)
+    atexit.register(save_tz_cache, TZ_CACHE_FILE)